@@ -9,19 +9,24 @@ from synonym.apps.project import create_project_app
 from synonym.apps.category import create_category_app
 from synonym.apps.origin import create_origin_app
 from synonym.apps.synonym import create_synonym_app
-from synonym.apps import crate_user_app
+from synonym.apps import crate_user_app, init_db_session
+from synonym.apps.encoder import init_json_provider
+from synonym.apps.schema import create_schema_command
 
 
 app = Flask(__name__)
+app = init_json_provider(app)
 bp = create_project_app()
 ca_bp = create_category_app()
 or_bp = create_origin_app()
 sy_bp = create_synonym_app()
 app = crate_user_app(app)
+app = init_db_session(app)
 app.register_blueprint(bp)
 app.register_blueprint(ca_bp)
 app.register_blueprint(or_bp)
 app.register_blueprint(sy_bp)
+app.cli.add_command(create_schema_command())
 
 
 if __name__ == '__main__':
@@ -1,9 +1,36 @@
 from synonym.client import Synonyms
 from flask import request, jsonify
 from ..response import UserResponse
+from ..connections import REPLICA_PIN_SECONDS
+import math
+import time
 import typing
 
 
+# Cookie which carries time until which reads of the client
+# are routed to primary after it writes
+DB_PIN_COOKIE = 'db_pinned_until'
+
+# Page size of list request which does not specify size
+DEFAULT_PAGE_SIZE = 100
+
+# Maximum page size of list request
+MAX_PAGE_SIZE = 1000
+
+
+def page_params():
+    """
+    Page, size and cursor of list request. List is always paginated,
+    so the first page of default size is read when they are not specified
+    and size is limited to MAX_PAGE_SIZE
+    """
+    page = int(request.args.get('page', 0)) or 1
+    size = int(request.args.get('size', 0))
+    size = min(size, MAX_PAGE_SIZE) if size > 0 else DEFAULT_PAGE_SIZE
+    cursor = request.args.get('cursor', None)
+    return page, size, cursor
+
+
 def crate_user_app(app):
 
     @app.route('/api/users', methods=['POST'])
@@ -23,6 +50,7 @@ def crate_user_app(app):
     @app.route('/api/users', methods=['GET'])
     def get_user():
         user_id = request.args.get('user_id', None)
+        page, size, cursor = page_params()
         where = []
         on_off = {}
 
@@ -33,6 +61,9 @@ def crate_user_app(app):
             'user_id': user_id,
             'where': where,
             'on_off': on_off,
+            'page': page,
+            'size': size,
+            'cursor': cursor,
             'response_model': typing.List[UserResponse]
         }
 
@@ -42,5 +73,48 @@ def crate_user_app(app):
 
     return app
 
+
+def init_db_session(app):
+    """
+    Remove database session of the request when app context
+    is torn down, so every request(thread) uses its own session.
+
+    Reads of client which wrote items are routed to primary for a while
+    so that the client reads own writes before replicas catch up.
+    The time is carried in cookie, so reads of the other clients
+    are kept on replicas
+    """
+    @app.before_request
+    def pin_db_reads():
+        connection = db_client.handler.connection
+        try:
+            until = float(request.cookies.get(DB_PIN_COOKIE, 0))
+        except ValueError:
+            until = 0
+        if not math.isfinite(until):
+            until = 0
+
+        # Cookie is written by client, so reads are not pinned
+        # longer than pin seconds from now
+        pin_seconds = connection.options.get('replica_pin_seconds', REPLICA_PIN_SECONDS)
+        connection.pin_reads(min(until, time.time() + pin_seconds))
+
+    @app.after_request
+    def keep_db_pin(response):
+        until = db_client.handler.connection.pinned_until
+        remaining = until - time.time()
+        if remaining > 0:
+            response.set_cookie(DB_PIN_COOKIE,
+                                repr(until),
+                                max_age=math.ceil(remaining),
+                                httponly=True)
+        return response
+
+    @app.teardown_appcontext
+    def remove_db_session(exception=None):
+        db_client.handler.close()
+
+    return app
+
 syn = Synonyms()
 db_client = syn.db
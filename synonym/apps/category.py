@@ -1,5 +1,5 @@
 import typing
-from . import db_client
+from . import db_client, page_params
 
 from flask import Blueprint, request, jsonify
 from synonym.response import CategoryResponse
@@ -29,13 +29,13 @@ def create_category_app():
         on_off = {}
 
         category_name = request.args.get('q', None)
-        page = int(request.args.get('page', 0)) #int
-        size = int(request.args.get('size', 0)) #int
+        page, size, cursor = page_params()
+        with_total = bool(int(request.args.get('total', 0)))
 
         where.append(('pjt_id', 'on_off'))
         on_off['pjt_id'] = True
         if category_name:
-            where.extend(['and', ('category_name', 'like')])
+            where.extend(['and', ('category_name', 'search')])
             on_off['category_name'] = True
 
 
@@ -44,6 +44,10 @@ def create_category_app():
             'category_name': category_name,
             'where': where,
             'on_off': on_off,
+            'page': page,
+            'size': size,
+            'cursor': cursor,
+            'with_total': with_total,
             'response_model': typing.List[CategoryResponse]
         }
         r = db_client.category('find', **request_params)
@@ -87,8 +91,10 @@ def create_category_app():
             'id': category_id,
             'where': where,
             'on_off': on_off,
-            'response_model': typing.List[CategoryResponse]
+            'set_based': True,
+            'returning': True
         }
+        # Items of relations are deleted by ON DELETE CASCADE in database
         r = db_client.category('delete', **request_params)
         return jsonify(r)
 
@@ -0,0 +1,110 @@
+import json
+import typing
+import uuid
+import datetime
+import decimal
+
+from flask import Flask
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask.json.provider import JSONProvider
+except ImportError:
+    # flask < 2.2 does not have pluggable json provider
+    JSONProvider = None
+
+
+JSON_MIMETYPE = 'application/json'
+
+
+def _default(obj):
+    """
+    Encode types which json can not encode natively.
+    Date is encoded in HTTP date format like default encoder of flask
+    ex) 'Wed, 21 Oct 2015 07:28:00 GMT'
+    """
+    if isinstance(obj, datetime.date):
+        return http_date(obj)
+    if isinstance(obj, datetime.time):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, Exception):
+        return str(obj)
+    if hasattr(obj, 'dict'):
+        # pydantic model
+        return obj.dict()
+    raise TypeError('%r is not JSON serializable' % type(obj))
+
+
+def dumps(obj: typing.Any) -> bytes:
+    """
+    Encode obj to json bytes. orjson is used when it is installed.
+    Datetime is passed through to _default, so it is encoded in
+    the same format by both encoders
+    """
+    if orjson is not None:
+        return orjson.dumps(obj,
+                            default=_default,
+                            option=orjson.OPT_NON_STR_KEYS |
+                                   orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(obj,
+                      default=_default,
+                      ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def loads(s: typing.Union[str, bytes]) -> typing.Any:
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
+if JSONProvider is not None:
+
+    class FastJSONProvider(JSONProvider):
+        """
+        Json provider of flask app using orjson when it is installed.
+        jsonify and request.get_json of app use this provider.
+        """
+        def dumps(self, obj, **kwargs):
+            return dumps(obj).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return loads(s)
+
+        def response(self, *args, **kwargs):
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(dumps(obj), mimetype=JSON_MIMETYPE)
+
+else:
+    FastJSONProvider = None
+
+
+class _LegacyJSONEncoder(json.JSONEncoder):
+    """
+    Json encoder of flask < 2.2. It encodes types like FastJSONProvider
+    """
+    def default(self, obj):
+        try:
+            return _default(obj)
+        except TypeError:
+            return super().default(obj)
+
+
+def init_json_provider(app: Flask) -> Flask:
+    """
+    Plug fast json provider into the app
+    """
+    if FastJSONProvider is not None:
+        app.json = FastJSONProvider(app)
+    else:
+        app.json_encoder = _LegacyJSONEncoder
+    return app
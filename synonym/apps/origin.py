@@ -2,13 +2,21 @@ import os
 import typing
 import uuid
 import datetime
+import tempfile
 
 from flask import Blueprint, request, jsonify, send_file
 
 from synonym.parse import FileParser, Sinker, Exporter
 from synonym.response import OriginResponse, SynonymFileOutput
+from synonym.utils import chk_request_parameter
 
-from . import db_client
+from . import db_client, page_params
+
+# Maximum size of export buffer kept in memory
+EXPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+# The number of origins read from database at once when exporting
+EXPORT_CHUNK_SIZE = 1000
 
 
 def create_origin_app():
@@ -38,6 +46,12 @@ def create_origin_app():
     @origin_bp.route('/api/pjts/<int:pjt_id>/categories/<int:category_id>/origins/bulk', methods=['POST'])
     def create_origin_bulk(pjt_id, category_id):
 
+        # insert: insert all rows in file
+        # upsert: insert new rows and update existing rows
+        # diff: apply only difference between file and category
+        mode = request.args.get('mode', 'insert')
+        dry_run = bool(int(request.args.get('dry_run', 0)))
+
         synonym_file = request.files.get('synonym_file', '')
         job_id = uuid.uuid4()
         new_filename = "{}.xlsx".format(job_id)
@@ -48,10 +62,22 @@ def create_origin_app():
             'pjt_id': pjt_id,
             'category_id': category_id,
             'bulk': fp.process(),
+            'upsert': mode == 'upsert',
             'fields': ['pjt_id', 'category_id', 'origin_keyword', 'synonym'],
             'response_model': typing.List[OriginResponse]
         }
-        r = db_client.origin('bulk_insert', **request_params)
+        if mode == 'diff':
+            # compare with origins and synonyms in the category
+            # response is summary of the difference
+            request_params.update({
+                'where': [('pjt_id', 'on_off'), ('category_id', 'on_off')],
+                'on_off': {'pjt_id': True, 'category_id': True},
+                'dry_run': dry_run,
+                'response_model': None
+            })
+            r = db_client.origin('bulk_diff', **request_params)
+        else:
+            r = db_client.origin('bulk_insert', **request_params)
         fp.remove()
         return r
 
@@ -59,7 +85,6 @@ def create_origin_app():
     def export_file(pjt_id, category_id):
         category_name = request.args.get('category_name', None)
         file_name = "{}-synonyms-{}.xlsx".format(category_name, datetime.datetime.now().strftime('%Y%m%d%H%M'))
-        path = os.path.join('./', file_name)
 
         where = []
         on_off = {}
@@ -73,34 +98,89 @@ def create_origin_app():
             'pjt_id': pjt_id,
             'where': where,
             'on_off': on_off,
-            'response_model': typing.List[OriginResponse]
+            'yield_per': EXPORT_CHUNK_SIZE,
+            'response_model': typing.Iterator[OriginResponse]
         }
+
+        # data of response is generator which reads origins in chunks
         response = db_client.origin('find', **request_params)
-        fp = FileParser(path, Exporter, response['data'])
+
+        # Workbook is written to spooled buffer instead of working directory.
+        # It is rolled over to anonymous temporary file when it gets large
+        # and removed when response is closed
+        buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+        fp = FileParser(buffer, Exporter, response['data'], ext='.xlsx')
         fp.process()
-        resp = send_file(path,
+        buffer.seek(0)
+        resp = send_file(buffer,
                          as_attachment=True,
                          mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                         attachment_filename=file_name)
-        fp.remove()
+                         download_name=file_name)
         return resp
 
 
     @origin_bp.route('/api/origins', methods=['GET'])
     def get_origin():
         origin_keyword = request.args.get('q', None)
-        page = int(request.args.get('page', 0))
-        size = int(request.args.get('size', 0))
+        page, size, cursor = page_params()
+        with_total = bool(int(request.args.get('total', 0)))
 
         where = []
         on_off = {}
         if origin_keyword:
-            where.append(('origin_keyword', 'like'))
+            where.append(('origin_keyword', 'search'))
 
         request_params = {
             'origin_keyword': origin_keyword,
             'where': where,
             'on_off': on_off,
+            'page': page,
+            'size': size,
+            'cursor': cursor,
+            'with_total': with_total,
+            'response_model': typing.List[OriginResponse]
+        }
+        response = db_client.origin('find', **request_params)
+
+        return jsonify(response)
+
+    @origin_bp.route('/api/pjts/<int:pjt_id>/origins/batch', methods=['POST'])
+    def get_origin_batch(pjt_id):
+        """
+        Get origins of project by list of ids or keywords in single request.
+        Keywords are matched exactly. If category_ids is specified with
+        origin_keywords, origins are matched by (category_id, origin_keyword) pairs
+            ex)
+                {"ids": [1, 2, 3]}
+                {"origin_keywords": ["a", "b"]}
+                {"category_ids": [1, 2], "origin_keywords": ["a", "b"]}
+        """
+        params = request.get_json()
+        ids = params.get('ids', None)
+        origin_keywords = params.get('origin_keywords', None)
+        category_ids = params.get('category_ids', None)
+        chk_request_parameter(bool(ids) or bool(origin_keywords),
+                              'ids or origin_keywords must be specified')
+
+        where = []
+        on_off = {}
+
+        where.append(('pjt_id', 'on_off'))
+        on_off['pjt_id'] = True
+        if ids:
+            where.append(('id', 'in'))
+        elif category_ids:
+            where.append((('category_id', 'origin_keyword'), 'in'))
+        else:
+            where.append(('origin_keyword', 'in'))
+
+        request_params = {
+            'pjt_id': pjt_id,
+            'id': ids,
+            'category_id': category_ids,
+            'origin_keyword': origin_keywords,
+            'where': where,
+            'on_off': on_off,
             'response_model': typing.List[OriginResponse]
         }
         response = db_client.origin('find', **request_params)
@@ -111,8 +191,8 @@ def create_origin_app():
     def get_origin_per_project(pjt_id):
 
         origin_keyword = request.args.get('q', None)
-        page = int(request.args.get('page', 0))
-        size = int(request.args.get('size', 0))
+        page, size, cursor = page_params()
+        with_total = bool(int(request.args.get('total', 0)))
 
         where = []
         on_off = {}
@@ -120,13 +200,17 @@ def create_origin_app():
         where.append(('pjt_id', 'on_off'))
         on_off['pjt_id'] = True
         if origin_keyword:
-            where.append(('origin_keyword', 'like'))
+            where.append(('origin_keyword', 'search'))
 
         request_params = {
             'pjt_id': pjt_id,
             'origin_keyword': origin_keyword,
             'where': where,
             'on_off': on_off,
+            'page': page,
+            'size': size,
+            'cursor': cursor,
+            'with_total': with_total,
             'response_model': typing.List[OriginResponse]
         }
         response = db_client.origin('find', **request_params)
@@ -138,8 +222,8 @@ def create_origin_app():
     @origin_bp.route('/api/pjt/<int:pjt_id>/categories/<int:category_id>/origins', methods=['GET'])
     def get_origin_per_category(pjt_id, category_id):
         origin_keyword = request.args.get('q', None)
-        page = int(request.args.get('page', 0))
-        size = int(request.args.get('size', 0))
+        page, size, cursor = page_params()
+        with_total = bool(int(request.args.get('total', 0)))
 
         where = []
         on_off = {}
@@ -150,7 +234,7 @@ def create_origin_app():
         on_off['category_id'] = True
 
         if origin_keyword:
-            where.append(('origin_keyword', 'like'))
+            where.append(('origin_keyword', 'search'))
 
         request_params = {
             'category_id': category_id,
@@ -158,6 +242,10 @@ def create_origin_app():
             'origin_keyword': origin_keyword,
             'where': where,
             'on_off': on_off,
+            'page': page,
+            'size': size,
+            'cursor': cursor,
+            'with_total': with_total,
             'response_model': typing.List[OriginResponse]
         }
         response = db_client.origin('find', **request_params)
@@ -203,8 +291,10 @@ def create_origin_app():
             'id': origin_id,
             'where': where,
             'on_off': on_off,
-            'response_model': typing.List[OriginResponse]
+            'set_based': True,
+            'returning': True
         }
+        # Items of relations are deleted by ON DELETE CASCADE in database
         r = db_client.origin('delete', **request_params)
         return jsonify(r)
 
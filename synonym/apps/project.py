@@ -1,6 +1,6 @@
 import typing
 from flask import Blueprint, request, jsonify
-from . import db_client
+from . import db_client, page_params
 from synonym.response import (
      ProjectResponse,
      project_find_pre_process
@@ -31,8 +31,8 @@ def create_project_app():
     def get_project():
         ismine = int(request.args.get('ismine', None))
         pjt_name = request.args.get('q', None)
-        page = int(request.args.get('page', 0))
-        size = int(request.args.get('size', 0))
+        page, size, cursor = page_params()
+        with_total = bool(int(request.args.get('total', 0)))
 
         user_id = int(request.headers.get("id", None))
 
@@ -40,7 +40,7 @@ def create_project_app():
         on_off = {}
 
         if not ismine:
-            return get_all_project(pjt_name, page, size)
+            return get_all_project(pjt_name, page, size, cursor, with_total)
 
         where.append(('id', 'on_off'))
         on_off['id'] = True
@@ -51,6 +51,8 @@ def create_project_app():
                         'on_off': on_off,
                         'page': page,
                         'size': size,
+                        'cursor': cursor,
+                        'with_total': with_total,
                         'response_model': typing.List[ProjectResponse],
                         'response_preprocess': project_find_pre_process
                     }
@@ -59,12 +61,12 @@ def create_project_app():
         return jsonify(response)
 
 
-    def get_all_project(pjt_name, page, size):
+    def get_all_project(pjt_name, page, size, cursor=None, with_total=False):
 
         where = []
         on_off = {}
         if pjt_name:
-            where.append(('pjt_name', 'like'))
+            where.append(('pjt_name', 'search'))
             on_off['pjt_name'] = True
 
         r = db_client.project('find',
@@ -73,6 +75,8 @@ def create_project_app():
                                on_off=on_off,
                                page=page,
                                size=size,
+                               cursor=cursor,
+                               with_total=with_total,
                                response_model=typing.List[ProjectResponse])
         return jsonify(r)
 
@@ -115,8 +119,10 @@ def create_project_app():
             'id': pjt_id,
             'where': where,
             'on_off': on_off,
-            'response_model': typing.List[ProjectResponse]
+            'set_based': True,
+            'returning': True
         }
+        # Items of relations are deleted by ON DELETE CASCADE in database
         r = db_client.project('delete', **request_params)
         return jsonify(r)
 
@@ -0,0 +1,74 @@
+import click
+
+from flask.cli import AppGroup
+
+from synonym.connections import get_engine
+from synonym.schema import (
+    verify_schema,
+    create_schema,
+    reindex_schema,
+    explain_access_paths
+)
+
+from . import db_client
+
+
+def create_schema_command():
+    """
+    Schema management command of the app
+        flask schema verify   : report missing tables, columns, indexes, foreign keys
+                                without ON DELETE of models and access paths
+        flask schema create   : create missing tables, columns and indexes and
+                                recreate foreign keys with ON DELETE of models
+        flask schema reindex  : rebuild n-gram index and normalized columns
+                                of keyword fields
+        flask schema explain  : show query plan of each access path
+    """
+    schema_cli = AppGroup('schema', help='Manage tables and indexes of database')
+
+    def _engine():
+        return get_engine(db_client.handler.hosts)
+
+    def _echo_report(report):
+        for kind, items in report.items():
+            for item in items:
+                if kind == 'foreign_keys':
+                    click.echo('foreign key differs from model: %s' % item)
+                else:
+                    click.echo('missing %s: %s' % (kind, item))
+
+    @schema_cli.command('verify')
+    def verify():
+        report = verify_schema(_engine())
+        _echo_report(report)
+        if any(report.values()):
+            raise SystemExit(1)
+        click.echo('schema is up to date')
+
+    @schema_cli.command('create')
+    def create():
+        report = create_schema(_engine())
+        for item in report['tables'] + report['columns'] + report['indexes']:
+            click.echo('created: %s' % item)
+        for item in report['foreign_keys']:
+            click.echo('recreated foreign key: %s' % item)
+
+        report = verify_schema(_engine())
+        _echo_report(report)
+        if any(report.values()):
+            raise SystemExit(1)
+        click.echo('schema is up to date')
+
+    @schema_cli.command('reindex')
+    def reindex():
+        for model, count in reindex_schema(_engine()).items():
+            click.echo('%s: %d items indexed' % (model, count))
+
+    @schema_cli.command('explain')
+    def explain():
+        for path, plan in explain_access_paths(_engine()).items():
+            click.echo(path)
+            for row in plan:
+                click.echo('    %s' % (row,))
+
+    return schema_cli
@@ -1,8 +1,27 @@
 from flask import Blueprint, request, jsonify
 import typing
-from synonym.response import SynonymResponse
+from synonym.response import SynonymResponse, SynonymLookupResponse
+from synonym.search import normalize_keyword
+from synonym.utils import chk_request_parameter
 from . import db_client
 
+
+def _match_tokens(responses, lookup_tokens, normalized=False, **options):
+    """
+    Group found synonyms by requested token. Token matches synonym keyword
+    exactly, or in normalized form if normalized is True.
+    Tokens without synonym are mapped to empty list
+        ex)
+            {"apple": [{"id": 1, "synm_keyword": "apple",
+                        "origin": {"id": 3, "category_id": 2, "origin_keyword": "사과"}}],
+             "pear": []}
+    """
+    key = normalize_keyword if normalized else str
+    matches = {}
+    for response in responses:
+        matches.setdefault(key(response['synm_keyword']), []).append(response)
+    return {token: matches.get(key(token), []) for token in lookup_tokens}
+
 def create_synonym_app():
 
     synonym_bp = Blueprint('synonym_app', __name__)
@@ -37,11 +56,95 @@ def create_synonym_app():
             'id': synm_id,
             'where': where,
             'on_off': on_off,
-            'response_model': typing.List[SynonymResponse]
+            'set_based': True,
+            'returning': True
         }
         r = db_client.synonym('delete', **request_params)
         return jsonify(r)
 
+    @synonym_bp.route('/api/pjts/<int:pjt_id>/synms/batch', methods=['POST'])
+    def get_synonym_batch(pjt_id):
+        """
+        Get synonyms of project by list of ids or origin ids in single request
+            ex)
+                {"ids": [1, 2, 3]}
+                {"origin_ids": [1, 2]}
+        """
+        params = request.get_json()
+        ids = params.get('ids', None)
+        origin_ids = params.get('origin_ids', None)
+        chk_request_parameter(bool(ids) or bool(origin_ids),
+                              'ids or origin_ids must be specified')
+
+        where = []
+        on_off = {}
+
+        where.append(('pjt_id', 'on_off'))
+        on_off['pjt_id'] = True
+        if ids:
+            where.append(('id', 'in'))
+        else:
+            where.append(('origin_id', 'in'))
+
+        request_params = {
+            'pjt_id': pjt_id,
+            'id': ids,
+            'origin_id': origin_ids,
+            'where': where,
+            'on_off': on_off,
+            'response_model': typing.List[SynonymResponse]
+        }
+        r = db_client.synonym('find', **request_params)
+        return jsonify(r)
+
+    @synonym_bp.route('/api/pjts/<int:pjt_id>/synonyms/lookup', methods=['GET', 'POST'])
+    def lookup_synonym(pjt_id):
+        """
+        Find origins(and categories) which tokens are synonyms of.
+        Tokens are given as q query arguments or tokens in json body for batch.
+        If normalized is 1, tokens are matched in normalized form(case, width and
+        whitespace are ignored). Synonym keywords are read with index by token, or by
+        normalized token on normalized column which is written on insert.
+            ex)
+                GET /api/pjts/1/synonyms/lookup?q=apple&q=pear&normalized=1
+                POST /api/pjts/1/synonyms/lookup {"tokens": ["apple", "pear"], "normalized": true}
+        """
+        if request.method == 'POST':
+            params = request.get_json() or {}
+            tokens = params.get('tokens', None) or []
+            normalized = bool(params.get('normalized', False))
+        else:
+            tokens = request.args.getlist('q')
+            normalized = bool(int(request.args.get('normalized', 0)))
+        chk_request_parameter(bool(tokens) and all(isinstance(token, str) for token in tokens),
+                              'q or tokens must be specified')
+
+        field = 'synm_keyword'
+        keywords = set(tokens)
+        if normalized:
+            field = 'synm_keyword_norm'
+            keywords = {normalize_keyword(token) for token in tokens}
+
+        where = []
+        on_off = {}
+
+        where.append(('pjt_id', 'on_off'))
+        on_off['pjt_id'] = True
+        where.append((field, 'in'))
+
+        request_params = {
+            'pjt_id': pjt_id,
+            field: sorted(keywords),
+            'lookup_tokens': tokens,
+            'normalized': normalized,
+            'where': where,
+            'on_off': on_off,
+            'response_model': typing.List[SynonymLookupResponse],
+            'response_postprocess': _match_tokens
+        }
+        r = db_client.synonym('find', **request_params)
+        return jsonify(r)
+
     @synonym_bp.route('/api/synonyms/bulk', methods=['POST'])
     def bulk_synonym():
         test_file = request.files.get('test_file', '')
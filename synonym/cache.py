@@ -0,0 +1,248 @@
+import time
+import threading
+
+from collections import OrderedDict
+from typing import (
+    Optional,
+    Dict,
+    Any,
+    Tuple,
+    FrozenSet,
+    Hashable,
+    Callable
+)
+
+
+class ResultCache:
+    """
+    In-process LRU cache of find responses. Entries expire after ttl
+    seconds and the least recently used entry is evicted when the cache
+    is full. Entries are tagged with models they are read from and
+    project id, so that writes invalidate only affected entries.
+
+    :param maxsize:
+        Maximum number of cached responses
+    :param ttl:
+        seconds while cached response is valid
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns cached response or None if it is not cached or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expire_at, _, _ = entry
+            if expire_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                self.evictions += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self,
+            key: Hashable,
+            value: Any,
+            models: FrozenSet[str],
+            pjt_id: Optional[Any] = None):
+        """
+        Cache response
+
+        :param key:
+            key made by make_key
+        :param value:
+            response to be cached
+        :param models:
+            names of models which response is read from
+        :param pjt_id:
+            project id which response belongs to. None means any project
+        """
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl, models, pjt_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, models: FrozenSet[str], pjt_id: Optional[Any] = None):
+        """
+        Remove cached responses read from written models. If pjt_id is
+        specified, responses of other projects are kept
+
+        :param models:
+            names of written models
+        :param pjt_id:
+            project id of written items. None means any project
+        """
+        with self._lock:
+            for key, (_, _, tags, entry_pjt_id) in list(self._entries.items()):
+                if not (tags & models):
+                    continue
+                if pjt_id is not None and entry_pjt_id is not None and \
+                        str(pjt_id) != str(entry_pjt_id):
+                    continue
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the cache
+        """
+        with self._lock:
+            return {'size': len(self._entries),
+                    'maxsize': self.maxsize,
+                    'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'invalidations': self.invalidations}
+
+
+class _Call:
+    """
+    In-flight call of SingleFlight
+    """
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls. The first caller of a key
+    executes the function and the others wait for it and share its
+    result(or error) instead of executing the function again.
+    """
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Execute fn once for concurrent calls of key
+
+        :param key:
+            key identifying the call
+        :param fn:
+            function without argument
+        """
+        with self._lock:
+            call = self._calls.get(key, None)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.shared += 1
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+def make_key(model: 'MODEL',
+             options: Dict[str, Any],
+             *args: Any) -> Tuple:
+    """
+    Make cache key of find request. Filter and order by made from
+    query plan are represented with query_key of db_params, that is,
+    key of plan and values of where fields. Otherwise they are compiled
+    to sql with bound parameters. The other options are represented
+    in the form of string
+
+    :param model:
+        target model
+    :param options:
+        arguments of find request including filter and order_by
+    :param args:
+        Additional values distinguishing responses.
+        ex) response model, pre-processor
+    """
+    rest = tuple(sorted((k, repr(v)) for k, v in options.items()
+                        if k not in ('filter', 'order_by', 'filter_chunks', 'query_key')))
+
+    query_key = options.get('query_key', None)
+    if query_key is None:
+        query_key = (_clause_key(options.get('filter', None)),
+                     _clause_key(options.get('order_by', None)),
+                     tuple(_clause_key(chunk) for chunk in options.get('filter_chunks', None) or ()))
+    return (model.__name__,
+            query_key,
+            tuple(repr(arg) for arg in args),
+            rest)
+
+
+def _clause_key(clauses) -> Tuple:
+    if clauses is None:
+        return ()
+    if not isinstance(clauses, (list, tuple)):
+        clauses = [clauses]
+
+    key = []
+    for clause in clauses:
+        compiled = clause.compile()
+        params = tuple(sorted((k, repr(v)) for k, v in compiled.params.items()))
+        key.append((str(compiled), params))
+    return tuple(key)
+
+
+_related_models: Dict[Any, FrozenSet[str]] = {}
+
+
+def related_models(model: 'MODEL') -> FrozenSet[str]:
+    """
+    Names of model and models reachable through its relationships.
+    Response of model can include them and writing model can
+    cascade to them
+    """
+    related = _related_models.get(model, None)
+    if related is not None:
+        return related
+
+    seen = {model}
+    stack = [model]
+    while stack:
+        current = stack.pop()
+        for relationship in current.__mapper__.relationships:
+            target = relationship.mapper.class_
+            if target not in seen:
+                seen.add(target)
+                stack.append(target)
+
+    related = frozenset(m.__name__ for m in seen)
+    _related_models[model] = related
+    return related
@@ -4,6 +4,7 @@
 import typing
 from .client import DBClient
 from .client import ElasticsearchClient
+from ..expansion import ExpanderRegistry, EXPANSION_TTL
 
 
 class Synonyms:
@@ -17,13 +18,18 @@ class Synonyms:
         self.options = options
         self.__es = ElasticsearchClient
         self.__db = DBClient
+        self._db_client = None
+        self._expanders = None
 
 
     @property
     def db(self):
         # 런타임 호출시 연결
-        options = self.options
-        return self.__db(self, **options)
+        # client is created once and database is connected when it is used first
+        if self._db_client is None:
+            options = self.options
+            self._db_client = self.__db(self, **options)
+        return self._db_client
 
     @property
     def es(self):
@@ -31,5 +37,30 @@ class Synonyms:
         options = self.options
         return self.__es(self, options)
 
-    def synonyms(self, q):
-        es = self.es
\ No newline at end of file
+    @property
+    def expanders(self):
+        # 프로젝트별 동의어 확장기는 처음 사용할 때 db에서 읽음
+        if self._expanders is None:
+            self._expanders = ExpanderRegistry(self.db,
+                                               self.options.get('expansion_ttl', EXPANSION_TTL))
+        return self._expanders
+
+    def synonyms(self, q: str, pjt_id: int, bidirectional: bool = False) -> typing.Tuple[str, ...]:
+        """
+        Expand q to its equivalent terms with synonym rules of project.
+        Rules are loaded from database into memory once per expansion_ttl
+        seconds, so expansion does not query database or elasticsearch
+            ex)
+                synonyms of origin '사과' are ['apple', 'ringo']
+                syn.synonyms('apple', pjt_id=1) -> ('사과',)
+                syn.synonyms('apple', pjt_id=1, bidirectional=True) -> ('apple', 'ringo', '사과')
+
+        :param q:
+            query term
+        :param pjt_id:
+            project id
+        :param bidirectional:
+            If it is False, synonyms are expanded to their origin.
+            Otherwise origin and its synonyms are expanded to each other
+        """
+        return self.expanders.get(pjt_id, bidirectional).expand(q)
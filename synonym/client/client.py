@@ -36,6 +36,34 @@ class DBClient(BaseClient):
     __client_prefix__ = 'DB'
     handler_class = DBHandler
 
+    # environment variable -> connection pool and cache option
+    __pool_environ__ = {
+        'db_pool_size': 'pool_size',
+        'db_max_overflow': 'max_overflow',
+        'db_pool_recycle': 'pool_recycle',
+        'db_pool_timeout': 'pool_timeout',
+        'db_cache_size': 'cache_size',
+        'db_cache_ttl': 'cache_ttl'
+    }
+
+    def __init__(self, client, **options):
+        # options specified by user have priority over environment variables
+        env_options = self._pool_options()
+        replicas = self._replica_hosts()
+        if replicas:
+            env_options['replicas'] = replicas
+        env_options.update(options)
+        super().__init__(client, **env_options)
+
+    def _pool_options(self):
+        info = self._from_env() or {}
+        options = {}
+        for key, option in self.__pool_environ__.items():
+            if key in info:
+                options[option] = float(info[key]) if option == 'cache_ttl' \
+                    else int(info[key])
+        return options
+
     @property
     def hosts(self):
         info = self._from_env()
@@ -46,6 +74,32 @@ class DBClient(BaseClient):
         url = self._make_url(info)
         return url
 
+    @property
+    def dialect(self):
+        """
+        Name of database backend. ex) mysql, sqlite
+        """
+        return self.handler.connection.dialect
+
+    def _replica_hosts(self):
+        """
+        Urls of replicas. Replica ips are specified in DB_REPLICA_IP
+        environment variable separated by comma and the other
+        information is the same with primary
+        ex)
+            DB_REPLICA_IP=10.0.0.2,10.0.0.3
+        """
+        info = self._from_env() or {}
+        replica_ips = info.pop('db_replica_ip', None)
+        if not replica_ips:
+            return []
+
+        urls = []
+        for ip in replica_ips.split(','):
+            info.update({'db_ip': ip.strip()})
+            urls.append(self._make_url(info))
+        return urls
+
     def _make_url(self, info):
         url = self._url_form()
         for key, value in info.items():
@@ -1,3 +1,10 @@
+import os
+import time
+import base64
+import itertools
+import json
+import threading
+from datetime import datetime
 from typing import (
     Optional,
     List,
@@ -5,12 +12,38 @@ from typing import (
     Dict,
     Union,
     Any,
-    Mapping
+    Mapping,
+    Iterator
 )
-from sqlalchemy import create_engine
+from sqlalchemy import (
+    create_engine,
+    event,
+    select,
+    text,
+    tuple_,
+    and_,
+    or_,
+    inspect,
+    DateTime,
+    UniqueConstraint
+)
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 from sqlalchemy.engine import Engine
-from sqlalchemy.orm import Session
-from sqlalchemy_pagination import paginate
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.orm import (
+    Session,
+    scoped_session,
+    sessionmaker,
+    selectinload,
+    joinedload,
+    load_only,
+    RelationshipProperty,
+    ColumnProperty
+)
 
 from elasticsearch import Elasticsearch
 
@@ -20,9 +53,29 @@ from .exceptions import (
     FilterError,
     OrderByError,
     UpdateError,
-    DeleteError
+    DeleteError,
+    PaginationError
+)
+from .types import Page
+from .utils import make_one_by_one, expand_columns
+from .schema import mismatched_foreign_keys
+from .search import (
+    index_keywords,
+    unindex_keywords,
+    unindex_cascaded,
+    normalize_fields,
+    has_indexed_items,
+    index_flushed,
+    search_fields,
+    uses_fulltext
 )
-from .utils import make_one_by_one
+
+
+# Default number of rows inserted with single executemany in bulk_insert
+BULK_CHUNK_SIZE = 1000
+
+# Maximum offset read with LIMIT/OFFSET. Deeper pages must be read with cursor
+MAX_PAGE_OFFSET = 10000
 
 
 def has_iterable(fields):
@@ -66,6 +119,15 @@ class Connection:
                     **options):
         raise NotImplementedError
 
+    def bulk_diff(self,
+                  model: 'MODEL',
+                  mapping: Dict['MODEL', Mapping],
+                  relations:  Dict[str, Dict['MODEL', Mapping]],
+                  filter: Union[List[Any], Any],
+                  order_by: List[Any],
+                  **options):
+        raise NotImplementedError
+
     def find(self,
              model: 'MODEL',
              mapping: Dict['MODEL', Mapping],
@@ -108,9 +170,30 @@ class DBConnection(Connection):
                  **options):
         super().__init__(handler, **options)
 
-        # Create session to communicate with database.
-        # And it is primary interface for persistence operations
-        self.create_session()
+        # query being built is kept per thread
+        self._local = threading.local()
+
+        # Session registry to communicate with database.
+        # And it is primary interface for persistence operations.
+        # It is created when session is used first, so database
+        # is not connected until the first request
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._dialect = None
+
+        # names of tables referred by foreign keys which do not cascade
+        # in database. It is read when items are deleted first
+        self._uncascaded = None
+
+    @property
+    def dialect(self) -> str:
+        """
+        Name of database backend. ex) mysql, sqlite
+        It is read from url without connecting to database
+        """
+        if self._dialect is None:
+            self._dialect = make_url(self.handler.hosts).get_backend_name()
+        return self._dialect
 
     def insert(self, model, mappings, relations, filter, order_by, **options):
         """
@@ -170,7 +253,9 @@ class DBConnection(Connection):
         """
         Method for inserting item in table in bulk way. Returns response db models
         set by user and raise error when field type is different.
-        This method is simply executes single insert method multiple times
+        Models are inserted in chunks with executemany of core insert statement.
+        After each chunk is inserted, generated ids are read back and relation
+        items referring them are inserted in chunks too.
 
         :param model:
             target model
@@ -200,18 +285,362 @@ class DBConnection(Connection):
                         .]
         :param options:
             Additional arguments for connection methods
+            chunk_size(int): the number of rows inserted at once.
+                             If it is not specified, bulk_chunk_size option
+                             of connection or BULK_CHUNK_SIZE is used
+            upsert(bool): If it is True, rows are inserted with
+                          INSERT ... ON DUPLICATE KEY UPDATE(ON CONFLICT in sqlite)
+                          keyed on unique constraint of the table. Existing rows
+                          are written only when their values are changed,
+                          so re-importing same data does not make duplicates.
         """
+        chunk_size = options.get('chunk_size', None) or \
+            self.options.get('bulk_chunk_size', BULK_CHUNK_SIZE)
+        upsert = options.get('upsert', False)
+
+        if not relations:
+            relations = [None] * len(mappings)
+
+        try:
+            rows = [as_tuple(mapping)[1] for mapping in mappings]
+        except Exception as e:
+            raise DBFieldTypeError("Cant not objective %s" % (model), e.args[0])
 
         model_lst = []
-        for mapping, relation in zip(mappings, relations):
-            model_inst = self.insert(model,
-                                     mapping,
-                                     relation,
-                                     **options)
-            model_lst.append(model_inst)
+        for start in range(0, len(rows), chunk_size):
+            row_chunk = rows[start:start + chunk_size]
+            relation_chunk = relations[start:start + chunk_size]
+            try:
+                ids = self._insert_chunk(model, row_chunk, upsert)
+                self._insert_relation_chunk(model, ids, relation_chunk, chunk_size, upsert)
+            except Exception as e:
+                if isinstance(e, (TypeError, AttributeError, KeyError)):
+                    raise DBFieldTypeError(
+                                "Cant not objective %s" % (model),
+                                 e.args[0])
+                raise DBConnectionError("N/A", e.args[0])
+
+            model_lst.extend(self._load_inserted(model, ids, relation_chunk))
 
         return model_lst
 
+    def _insert_chunk(self, model, rows, upsert=False):
+        """
+        Insert rows with single executemany and returns generated ids
+        in the same order with rows.
+        Driver like pymysql does not return ids of executemany, so ids
+        are read back with unique key values of rows. It is the same
+        for upserted rows whose ids are not generated.
+        Table which does not have unique key in rows is inserted
+        row by row to get generated ids.
+
+        :param model:
+            target model
+        :param rows:
+            List of dictionary of field and value
+        :param upsert:
+            refer to bulk_insert method
+        """
+        table = model.__table__
+        keys = list(rows[0].keys())
+
+        unique_keys = _find_unique_key(table, keys)
+        if unique_keys is None:
+            if upsert:
+                _unique_key(table, keys)
+            ids = [self.session.execute(table.insert(), row).inserted_primary_key[0]
+                   for row in rows]
+        else:
+            stmt = self._upsert_statement(table, keys, unique_keys) if upsert \
+                else table.insert()
+            self.session.execute(stmt, rows)
+            ids = self._read_ids(table, unique_keys, rows)
+
+        # core insert is not flushed, so keyword index is written here
+        index_keywords(self.session, model, ids, rows)
+        return ids
+
+    def _read_ids(self, table, unique_keys, rows):
+        """
+        Read ids of rows with their unique key values in single
+        tuple IN query. Returns ids in the same order with rows.
+
+        Database can store value in other form than given value,
+        ex) '1' for integer column, so values are compared after they are
+        converted to type of column. Strings are compared regardless of
+        case and trailing spaces like collation of database
+
+        :param table:
+            target table
+        :param unique_keys:
+            column names of unique constraint
+        :param rows:
+            List of dictionary of field and value
+        """
+        key_columns = [table.c[key] for key in unique_keys]
+        key_values = list({tuple(row[key] for key in unique_keys) for row in rows})
+        if len(key_columns) == 1:
+            condition = key_columns[0].in_([value[0] for value in key_values])
+        else:
+            condition = tuple_(*key_columns).in_(key_values)
+        stmt = select([table.c.id] + key_columns).where(condition)
+
+        id_map = {_key_of(key_columns, row[1:]): row[0]
+                  for row in self.session.execute(stmt)}
+        ids = []
+        for row in rows:
+            key = _key_of(key_columns, [row[key] for key in unique_keys])
+            if key not in id_map:
+                raise DBConnectionError('Inserted item is not found',
+                                        '%s does not have %s' % (table.name, key))
+            ids.append(id_map[key])
+        return ids
+
+    def _upsert_statement(self, table, keys, unique_keys):
+        """
+        Make insert statement which updates existing row having
+        same unique key values. Only changed values are written.
+
+        :param table:
+            target table
+        :param keys:
+            column names of inserted rows
+        :param unique_keys:
+            column names of unique constraint
+        """
+        update_keys = [key for key in keys if key not in unique_keys]
+        dialect = self.session.get_bind().dialect.name
+
+        if dialect == 'mysql':
+            # MySQL does not write the row when updated values are the same
+            stmt = mysql_insert(table)
+            update = {key: stmt.inserted[key] for key in update_keys}
+            if not update:
+                update = {'id': table.c.id}
+            return stmt.on_duplicate_key_update(**update)
+
+        if dialect in ('sqlite', 'postgresql'):
+            stmt = {'sqlite': sqlite_insert,
+                    'postgresql': postgresql_insert}[dialect](table)
+            if not update_keys:
+                return stmt.on_conflict_do_nothing(index_elements=unique_keys)
+
+            changed = or_(*[table.c[key] != stmt.excluded[key] for key in update_keys])
+            return stmt.on_conflict_do_update(
+                        index_elements=unique_keys,
+                        set_={key: stmt.excluded[key] for key in update_keys},
+                        where=changed)
+
+        raise DBConnectionError('Upsert is not supported',
+                                '%s dialect can not upsert' % dialect)
+
+    def _insert_relation_chunk(self, model, ids, relations, chunk_size, upsert=False):
+        """
+        Insert relation items of inserted models. Foreign key of relation
+        items is filled with ids of inserted models.
+
+        :param model:
+            target model
+        :param ids:
+            generated ids of inserted models
+        :param relations:
+            List of dictionary of relations. refer to bulk_insert
+        :param chunk_size:
+            the number of rows inserted at once
+        :param upsert:
+            refer to bulk_insert method
+        """
+        relation_rows = {}
+        for model_id, relation in zip(ids, relations):
+            if not relation:
+                continue
+            for field, mapping in relation.items():
+                prop = getattr(model, field).property
+                relation_model, fields = as_tuple(mapping)
+
+                # local column of model is primary key, remote column is foreign key.
+                # Foreign key is broadcast to every row with the other fields
+                fields = dict(fields)
+                for local, remote in prop.local_remote_pairs:
+                    fields[remote.key] = model_id
+                keys, rows = expand_columns(fields)
+                relation_rows.setdefault(relation_model, []).extend(
+                    dict(zip(keys, row)) for row in rows)
+
+        for relation_model, rows in relation_rows.items():
+            table = relation_model.__table__
+            stmt = table.insert()
+            if upsert:
+                keys = list(rows[0].keys())
+                stmt = self._upsert_statement(table, keys, _unique_key(table, keys))
+            for start in range(0, len(rows), chunk_size):
+                self.session.execute(stmt, rows[start:start + chunk_size])
+
+    def _load_inserted(self, model, ids, relations):
+        """
+        Load inserted models with their relations for response
+
+        :param model:
+            target model
+        :param ids:
+            generated ids of inserted models
+        :param relations:
+            List of dictionary of relations. refer to bulk_insert
+        """
+        query = self.session.query(model).filter(model.id.in_(ids))
+        fields = set()
+        for relation in relations:
+            if relation:
+                fields.update(relation.keys())
+        for field in fields:
+            query = query.options(selectinload(getattr(model, field)))
+
+        models = {model_inst.id: model_inst for model_inst in query}
+        return [models[model_id] for model_id in ids]
+
+    def bulk_diff(self, model, mappings, relations, filter, order_by, **options):
+        """
+        Method for applying only changes between given items and items in table.
+        Items are compared in pairs of model and its relation item,
+        ex) (origin_keyword, synm_keyword)
+        Current pairs of items matched with filter are read in single projection
+        query. Then added pairs are inserted and removed pairs are deleted.
+        Models which do not appear in given items are deleted with their relations.
+        Returns summary of the difference.
+
+        :param model:
+            target model
+        :param mappings:
+            refer to bulk_insert method
+        :param relations:
+            refer to bulk_insert method. It must have single relation field
+        :param filter:
+            filter of items to be compared. ex) items in a category
+        :param options:
+            Additional arguments for connection methods
+            dry_run(bool): If it is True, only difference is computed
+                           without writing
+            chunk_size(int): refer to bulk_insert method
+        """
+        dry_run = options.get('dry_run', False)
+        chunk_size = options.get('chunk_size', None) or \
+            self.options.get('bulk_chunk_size', BULK_CHUNK_SIZE)
+
+        try:
+            rows = [as_tuple(mapping)[1] for mapping in mappings]
+            field = next(iter(relations[0]))
+            prop = getattr(model, field).property
+            relation_model = prop.mapper.class_
+
+            # model key: unique key of model. ex) (category_id, origin_keyword)
+            # relation key: unique key of relation except foreign key. ex) (synm_keyword,)
+            foreign_keys = [remote.key for _, remote in prop.local_remote_pairs]
+            model_key = _unique_key(model.__table__, list(rows[0].keys()))
+            relation_rows = [_expand_relation_fields(as_tuple(relation[field])[1])
+                             for relation in relations]
+            relation_key = [key for key in
+                            _unique_key(relation_model.__table__,
+                                        list(relation_rows[0][0].keys()) + foreign_keys)
+                            if key not in foreign_keys]
+        except Exception as e:
+            raise DBFieldTypeError("Cant not objective %s" % (model), e.args[0])
+
+        # values are compared as string, because value read from file
+        # can be different type with value read from database
+        def make_key(row, keys):
+            return tuple(str(row[key]) for key in keys)
+
+        file_models = {}
+        file_pairs = {}
+        for row, rel_rows in zip(rows, relation_rows):
+            mk = make_key(row, model_key)
+            file_models[mk] = row
+            for rel_row in rel_rows:
+                file_pairs[(mk, make_key(rel_row, relation_key))] = rel_row
+
+        # Current pairs in single projection query
+        try:
+            self.query = self.session.query(
+                            model.id,
+                            *[getattr(model, key) for key in model_key],
+                            *[getattr(relation_model, key) for key in relation_key]
+                        ).outerjoin(getattr(model, field))
+            query = self._apply_filter(filter)
+        except Exception as e:
+            raise FilterError("Filter is improperly made", e.args[0])
+
+        db_models = {}
+        db_pairs = {}
+        size = len(model_key)
+        for row in query:
+            mk = tuple(str(v) for v in row[1:size + 1])
+            db_models[mk] = row[0]
+            relation_values = tuple(row[size + 1:])
+            if all(v is None for v in relation_values):
+                continue
+            db_pairs[(mk, tuple(str(v) for v in relation_values))] = (row[0],) + relation_values
+
+        added = file_pairs.keys() - db_pairs.keys()
+        removed = db_pairs.keys() - file_pairs.keys()
+        added_models = file_models.keys() - db_models.keys()
+        removed_models = db_models.keys() - file_models.keys()
+
+        summary = {'added': len(added),
+                   'removed': len(removed),
+                   'unchanged': len(file_pairs.keys() & db_pairs.keys()),
+                   'added_models': len(added_models),
+                   'removed_models': len(removed_models),
+                   'dry_run': dry_run}
+        if dry_run:
+            return summary
+
+        # Relations of removed models are deleted by ON DELETE CASCADE.
+        # Foreign keys created before it is declared do not cascade,
+        # so relations are deleted first
+        is_cascaded = self._is_cascaded(model)
+
+        try:
+            model_ids = [db_models[mk] for mk in removed_models]
+            foreign_key = getattr(relation_model, foreign_keys[0])
+            for start in range(0, len(model_ids), chunk_size):
+                chunk_ids = model_ids[start:start + chunk_size]
+                if not is_cascaded:
+                    self.session.query(relation_model) \
+                        .filter(foreign_key.in_(chunk_ids)) \
+                        .delete(synchronize_session=False)
+                self.session.query(model) \
+                    .filter(model.id.in_(chunk_ids)) \
+                    .delete(synchronize_session=False)
+                unindex_keywords(self.session, model, chunk_ids)
+
+            pair_values = [db_pairs[pair] for pair in removed if pair[0] in file_models]
+            pair_columns = [getattr(relation_model, key) for key in foreign_keys + relation_key]
+            for start in range(0, len(pair_values), chunk_size):
+                self.session.query(relation_model) \
+                    .filter(tuple_(*pair_columns).in_(pair_values[start:start + chunk_size])) \
+                    .delete(synchronize_session=False)
+
+            new_rows = [file_models[mk] for mk in added_models]
+            for start in range(0, len(new_rows), chunk_size):
+                row_chunk = new_rows[start:start + chunk_size]
+                ids = self._insert_chunk(model, row_chunk)
+                for row, model_id in zip(row_chunk, ids):
+                    db_models[make_key(row, model_key)] = model_id
+
+            insert_rows = []
+            for pair in added:
+                rel_row = dict(file_pairs[pair])
+                for key in foreign_keys:
+                    rel_row[key] = db_models[pair[0]]
+                insert_rows.append(rel_row)
+            table = relation_model.__table__
+            for start in range(0, len(insert_rows), chunk_size):
+                self.session.execute(table.insert(), insert_rows[start:start + chunk_size])
+        except Exception as e:
+            raise DBConnectionError("N/A", e.args[0])
+
+        return summary
+
     def find(self, model, mappings, relations, filter, order_by, **options):
         """
         Method for finding item in table. Returns response db models
@@ -236,16 +665,81 @@ class DBConnection(Connection):
                 order_by = [desc(model.field1), asc(model.field2)]
         :param options:
             Additional arguments for connection methods.
-            page(int): when pagenation is applied, indicating the number of pages
+            page(int): when pagenation is applied, indicating the number of pages.
+                       It starts from 1 and is read with LIMIT/OFFSET
             size(int): How many items should appear per page
+            cursor(str): next_cursor of previous page. If it is specified,
+                         page is read with keyset(seek) pagination instead of OFFSET.
+                         It is used for deep pages
+            seek(str): field of keyset pagination, 'id' or 'updated_at'.
+                       Default is 'id'
+            with_total(bool): If it is True, the number of all matched items is counted
+            load_relations(dict): Dictionary of relation field and its nested relation fields
+                                  which are loaded eagerly with found items.
+                                  Collection is loaded with selectinload and
+                                  scalar relation is loaded with joinedload
+                ex)
+                    load_relations = {'synonym': {}}
+            load_columns(list): field names to be loaded. Other columns are deferred.
+                                If any field is not column of model, all columns are loaded
+            yield_per(int): If it is specified, response is not a list but
+                            generator which yields db models read from database
+                            in chunks of yield_per size. Peak memory stays flat
+                            no matter how many items are matched.
+            filter_chunks(list): filters made from chunks of long membership(in) list.
+                                 Items are found with each filter and concatenated.
+                                 It can not be paginated
+
+        If replica is configured, items are read from replica. When replica
+        fails, items are read again from primary.
         """
+        filter_chunks = options.pop('filter_chunks', None)
+        if filter_chunks:
+            if options.get('size', None) and \
+                    (options.get('page', None) or options.get('cursor', None)):
+                raise PaginationError('Page is improperly requested',
+                                      'membership list longer than chunk can not be paginated')
+            return _merge_chunks([self.find(model, mappings, relations, chunk, order_by, **options)
+                                  for chunk in filter_chunks])
 
-        # page = options.pop('page')
-        # size = options.pop('size')
+        try:
+            return self._find(model, filter, order_by, **options)
+        except OperationalError:
+            session = self.session
+            if not session.info.get('replica_used', False):
+                raise
+
+            # replica is marked down by error handler of its engine,
+            # read again from primary
+            session.rollback()
+            session.info['pin_primary'] = True
+            return self._find(model, filter, order_by, **options)
+
+    def _find(self, model, filter, order_by, **options):
+        """
+        Build and execute find query. refer to find method
+        """
+        page = options.get('page', None)
+        size = options.get('size', None)
+        cursor = options.get('cursor', None)
+        yield_per = options.get('yield_per', None)
         self.query = self.session.query(model)
 
+        load_relations = options.get('load_relations', None)
+        if load_relations:
+            self.query = self.query.options(
+                            *_eager_load_options(model, load_relations))
+
+        load_columns = options.get('load_columns', None)
+        if load_columns:
+            columns = _load_only_columns(model,
+                                         list(load_columns) + [options.get('seek', 'id')],
+                                         load_relations)
+            if columns:
+                self.query = self.query.options(load_only(*columns))
+
         try:
-            query = self._apply_filter(filter)
+            self.query = self._apply_filter(filter)
 
             try:
                 query = self._apply_order_by(order_by)
@@ -255,22 +749,120 @@ class DBConnection(Connection):
         except Exception as e:
             raise FilterError("Filter is improperly made", e.args[0])
 
-        #Todo pagenation 코드 짜기
-        # if page and size:
-        #     pages = paginate(query, page, size)
+        if yield_per:
+            return _iterate_in_chunks(query, model, yield_per)
+
+        if size and (page or cursor):
+            return self._paginate(query,
+                                  model,
+                                  page,
+                                  size,
+                                  cursor,
+                                  bool(order_by),
+                                  seek=options.get('seek', 'id'),
+                                  with_total=options.get('with_total', False))
 
         response = query.all()
         return response
 
+    def _paginate(self, query, model, page, size, cursor, is_ordered,
+                  seek='id', with_total=False):
+        """
+        Read a page of query result. Returns Page which carries
+        next cursor and total count.
+        Small offsets are read with LIMIT/OFFSET. Deep pages must be read
+        with cursor of previous page, which applies keyset condition
+        on seek columns so that database does not scan skipped rows.
+
+        :param query:
+            query object which filter and order by are applied
+        :param model:
+            target model
+        :param page:
+            page number starts from 1
+        :param size:
+            How many items should appear per page
+        :param cursor:
+            opaque token made from seek column values of last item in previous page
+        :param is_ordered:
+            whether order by is specified by user. Keyset can not be applied
+            to user order, so next cursor is not made
+        :param seek:
+            field of keyset pagination, 'id' or 'updated_at'
+        :param with_total:
+            If it is True, count the number of all matched items
+        """
+        seek_columns = _seek_columns(model, seek)
+
+        total = None
+        if with_total:
+            total = query.order_by(None).count()
+
+        if cursor:
+            if is_ordered:
+                raise PaginationError('Cursor is improperly requested',
+                                      'cursor can not be applied with order by')
+            values = _decode_cursor(cursor, seek_columns)
+            query = query.filter(_seek_filter(seek_columns, values))
+            page = None
+        else:
+            offset = (page - 1) * size
+            if page < 1 or offset > MAX_PAGE_OFFSET:
+                raise PaginationError('Page is improperly requested',
+                                      'page must be in 1 ~ %d, use cursor for deep pages'
+                                      % (MAX_PAGE_OFFSET // size + 1))
+
+        # order by must be applied before LIMIT/OFFSET
+        if not is_ordered:
+            query = query.order_by(*seek_columns)
+        if page is not None:
+            query = query.offset((page - 1) * size)
+
+        items = query.limit(size).all()
+
+        next_cursor = None
+        if not is_ordered and len(items) == size:
+            last = items[-1]
+            next_cursor = _encode_cursor([getattr(last, column.key)
+                                          for column in seek_columns])
+
+        return Page(items,
+                    next_cursor=next_cursor,
+                    total=total,
+                    page=page,
+                    size=size)
+
     def update(self, model, mappings, relations, filter, order_by, **options):
         """
         Method for updating item in table. Returns response db models
         set by user and raise error when filter are improperly
         specified or when update item type is not properly specified
+
+        :param options:
+            Additional arguments for connection methods.
+            set_based(bool): If it is True, items are updated with single
+                             UPDATE ... WHERE statement without being loaded.
+                             Returns dictionary of the number of updated items
+                             ex) {'count': 3}
+            returning(bool): It is used with set_based. If it is True,
+                             ids of updated items are returned together
+                             ex) {'count': 3, 'ids': [1, 2, 3]}
+            filter_chunks(list): refer to find method
         """
+        filter_chunks = options.pop('filter_chunks', None)
+        if filter_chunks:
+            return _merge_chunks([self.update(model, mappings, relations, chunk, order_by, **options)
+                                  for chunk in filter_chunks])
+
         self.query = self.session.query(model)
         #filter 적용
 
+        if options.get('set_based', False):
+            return self._update_set_based(model,
+                                          mappings,
+                                          filter,
+                                          options.get('returning', False))
+
         try:
             # apply filter
             query = self._apply_filter(filter)
@@ -280,6 +872,7 @@ class DBConnection(Connection):
 
             # resolve mapping values to tuple for applying update
             _, fields = as_tuple(mappings)
+            fields = normalize_fields(model, fields)
             try:
                 response = update_items(response, fields)
 
@@ -295,23 +888,144 @@ class DBConnection(Connection):
         Method for delete item in table. Returns response db models
         set by user and raise error when filter are improperly
         specified
+
+        :param options:
+            Additional arguments for connection methods.
+            set_based(bool): If it is True, items are deleted with single
+                             DELETE ... WHERE statement without being loaded.
+                             Items of relations are deleted by ON DELETE CASCADE
+                             foreign keys in database. If foreign keys in database
+                             do not cascade yet(refer to synonym.schema), items are
+                             deleted with orm cascade instead.
+                             Returns dictionary of the number of deleted items
+                             ex) {'count': 3}
+            returning(bool): It is used with set_based. If it is True,
+                             ids of deleted items are returned together
+                             ex) {'count': 3, 'ids': [1, 2, 3]}
+            filter_chunks(list): refer to find method
         """
+        filter_chunks = options.pop('filter_chunks', None)
+        if filter_chunks:
+            return _merge_chunks([self.delete(model, mappings, relations, chunk, order_by, **options)
+                                  for chunk in filter_chunks])
 
         self.query = self.session.query(model)
 
+        set_based = options.get('set_based', False)
+        is_cascaded = self._is_cascaded(model)
+        if set_based and is_cascaded:
+            return self._delete_set_based(model,
+                                          filter,
+                                          options.get('returning', False))
+
         try:
             query = self._apply_filter(filter)
             responses = query.all()
             try:
+                # items deleted by database cascade are not flushed by orm
+                if is_cascaded:
+                    unindex_cascaded(self.session, model, [item.id for item in responses])
                 for query in responses:
+                    # relations are not loaded with passive_deletes,
+                    # so they are loaded to be deleted with orm cascade
+                    if not is_cascaded:
+                        _load_cascades(query)
                     self.session.delete(query)
             except Exception as e:
                 raise DeleteError("Can not be deleted", e.args[0])
         except Exception as e:
             raise DBConnectionError("DB error", e.args[0])
 
+        if set_based:
+            ids = [item.id for item in responses]
+            return _set_based_response(len(ids), ids if options.get('returning', False) else None)
         return responses
 
+    def _is_cascaded(self, model) -> bool:
+        """
+        Whether rows of relations of model are deleted by ON DELETE CASCADE
+        foreign keys in database. Foreign keys of tables created before
+        ON DELETE CASCADE is declared do not cascade until they are
+        recreated with schema command. It is checked once per connection
+        """
+        if self._uncascaded is None:
+            try:
+                mismatched = mismatched_foreign_keys(self._create_engine())
+            except Exception as e:
+                raise DBConnectionError("DB error", e.args[0])
+            self._uncascaded = {fk.referred_table.name for _, fk in mismatched}
+
+        if not self._uncascaded:
+            return True
+        return not (_dependent_tables(model.__table__) & self._uncascaded)
+
+    def _update_set_based(self, model, mappings, filter, returning=False):
+        """
+        Update items matched with filter in single statement.
+        Session is not synchronized, so updated items are not loaded.
+
+        :param model:
+            target model
+        :param mappings:
+            refer to update method
+        :param filter:
+            refer to find method
+        :param returning:
+            whether ids of updated items are returned
+        """
+        try:
+            query = self._apply_filter(filter)
+            _, fields = as_tuple(mappings)
+            fields = normalize_fields(model, fields)
+        except Exception as e:
+            raise DBConnectionError("Filter is improperly made", e.args[0])
+
+        # ids are needed to index updated keyword fields
+        is_indexed = bool(set(fields) & set(search_fields(model))) and \
+            not uses_fulltext(self.dialect)
+        try:
+            ids = _matched_ids(query, model) if returning or is_indexed else None
+            count = query.update(fields, synchronize_session=False)
+            if is_indexed:
+                index_keywords(self.session, model, ids, [fields] * len(ids))
+        except Exception as e:
+            raise UpdateError('Can not be updated', e.args[0])
+
+        return _set_based_response(count, ids if returning else None)
+
+    def _delete_set_based(self, model, filter, returning=False):
+        """
+        Delete items matched with filter in single statement.
+        ORM cascades are not walked. Relations are deleted by
+        ON DELETE CASCADE foreign keys in database.
+
+        :param model:
+            target model
+        :param filter:
+            refer to find method
+        :param returning:
+            whether ids of deleted items are returned
+        """
+        try:
+            query = self._apply_filter(filter)
+        except Exception as e:
+            raise DBConnectionError("DB error", e.args[0])
+
+        is_indexed = has_indexed_items(model) and not uses_fulltext(self.dialect)
+        try:
+            ids = _matched_ids(query, model) if returning or is_indexed else None
+
+            # items deleted by cascade are selected before they are deleted
+            if is_indexed:
+                unindex_cascaded(self.session, model, ids)
+            count = query.delete(synchronize_session=False)
+            if is_indexed:
+                unindex_keywords(self.session, model, ids)
+        except Exception as e:
+            raise DeleteError("Can not be deleted", e.args[0])
+
+        return _set_based_response(count, ids if returning else None)
+
     def _apply_filter(self, filter):
         """
         It is simply applying filter to sqlalchemy object
@@ -323,7 +1037,7 @@ class DBConnection(Connection):
             filter = [model.field1 == 'value1',model.like(%value2%), ...]
         """
         #If filter is not specified, return initial query
-        if not filter:
+        if filter is None:
             return self.query
 
         if not isinstance(filter, list):
@@ -350,28 +1064,131 @@ class DBConnection(Connection):
 
 
     def create_session(self, bind=None):
-
+        """
+        Create session registry. Each thread(request) gets its own
+        session from the registry, so sessions are not shared between
+        threads. scopefunc option can be specified to scope sessions
+        other than thread. ex) greenlet
+        """
         if bind is None:
             bind = self._create_engine()
 
-        self._session = Session(bind=bind)
+        # Read queries are routed to replicas when replicas option is specified
+        replicas = None
+        if self.options.get('replicas', None):
+            replicas = ReplicaSet(
+                        [get_engine(hosts, **self._pool_options())
+                         for hosts in self.options['replicas']],
+                        retry_interval=self.options.get('replica_retry_interval',
+                                                        REPLICA_RETRY_INTERVAL),
+                        pin_seconds=self.options.get('replica_pin_seconds',
+                                                     REPLICA_PIN_SECONDS))
+
+        factory = sessionmaker(bind=bind,
+                               class_=RoutingSession,
+                               replicas=replicas,
+                               pinned=self.is_pinned)
+        self._session = scoped_session(factory,
+                                       scopefunc=self.options.get('scopefunc', None))
 
     @property
     def session(self) -> Session:
         """
-        Connection channel to communicate with database
+        Connection channel to communicate with database.
+        It is session of current thread(request)
         """
-        return self._session
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self.create_session()
+        return self._session()
+
+    @property
+    def query(self):
+        """
+        Query being built in current thread(request)
+        """
+        return getattr(self._local, 'query', None)
+
+    @query.setter
+    def query(self, query):
+        self._local.query = query
 
     def _create_engine(self) -> Engine:
         """
-        The Engine is the starting point for any SQLAlchemy application
+        The Engine is the starting point for any SQLAlchemy application.
+        Engine is shared in process per hosts, so connection pool is not
+        created whenever connection is created.
+
+        Pool is configured with options
+            pool_size(int): the number of connections kept in pool
+            max_overflow(int): the number of connections opened beyond pool_size
+            pool_recycle(int): seconds after which connection is recycled
+            pool_timeout(int): seconds to wait for connection from pool
+        """
+        return get_engine(self.handler.hosts, **self._pool_options())
+
+    def _pool_options(self) -> Dict[str, Any]:
+        return {key: self.options[key]
+                for key in POOL_OPTIONS if key in self.options}
+
+    def close(self):
+        """
+        Close session of current thread(request) to cut connection down
+        with database and remove it from registry
+        """
+        if self._session is not None:
+            self._session.remove()
+
+    def read_only(self):
+        """
+        Mark current session read-only. Reads of the session are
+        executed in autocommit mode without transaction, so it is
+        not needed to flush and commit
+        """
+        self.session.info['read_only'] = True
+
+    def pin_primary(self):
+        """
+        Route every query of current session to primary.
+        It is used before write so that the session reads own writes
+        """
+        self.session.info['pin_primary'] = True
+
+    @property
+    def pinned_until(self) -> float:
+        """
+        Time(epoch seconds) until which reads of current thread(request)
+        are routed to primary. It is extended when current thread commits
+        writes, so only the writer reads own writes from primary
+        while the other threads keep reading from replicas
         """
-        return create_engine(self.handler.hosts,
-                             echo=False,
-                             pool_pre_ping=True,
-                             pool_size=50,
-                             max_overflow=50)
+        return getattr(self._local, 'pinned_until', 0)
+
+    def pin_reads(self, until: float = 0):
+        """
+        Set time until which reads of current thread(request) are routed
+        to primary. Web app carries it between requests of the same client,
+        ex) in cookie, and sets it when request starts. 0 unpins reads
+
+        :param until:
+            epoch seconds
+        """
+        self._local.pinned_until = until
+
+    def is_pinned(self) -> bool:
+        return time.time() < self.pinned_until
+
+    def reads_primary(self) -> bool:
+        """
+        Whether reads of current thread(request) are routed to primary
+        to read own writes. Pinned reads must not be shared with the other
+        threads nor served from cache which can be older than the writes
+        """
+        if self.is_pinned():
+            return True
+        return self._session is not None and \
+            self.session.info.get('pin_primary', False)
 
     def rollback(self):
         """
@@ -387,15 +1204,558 @@ class DBConnection(Connection):
 
     def commit(self):
         """
-        Commit for applying result in database
+        Commit for applying result in database.
+        After writes are committed, reads of current thread(request)
+        are routed to primary for pin_seconds of replicas
         """
-        self.session.commit()
+        session = self.session
+        is_written = session.info.get('pin_primary', False)
+        session.commit()
+        if is_written and session.replicas is not None:
+            self.pin_reads(max(self.pinned_until,
+                               time.time() + session.replicas.pin_seconds))
 
-    def close(self):
+
+# Seconds to skip replica after connection error is raised from it
+REPLICA_RETRY_INTERVAL = 30
+
+# Seconds to read from primary after write
+REPLICA_PIN_SECONDS = 1
+
+# Default pool options. They are overridden by environment variables
+# DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE and DB_POOL_TIMEOUT
+POOL_OPTIONS = {
+    'pool_size': 50,
+    'max_overflow': 50,
+    'pool_recycle': 3600,
+    'pool_timeout': 30
+}
+
+_engines: Dict[Tuple, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(hosts: str, **options) -> Engine:
+    """
+    Returns engine of hosts from process-wide registry. Engine is created
+    when it is requested first. Creating engine does not connect to
+    database, connection is opened when it is used first.
+
+    :param hosts:
+        Url in the form of interworking with sqlalchemy database
+    :param options:
+        pool options, refer to POOL_OPTIONS
+    """
+    key = (hosts, tuple(sorted(options.items())))
+    engine = _engines.get(key, None)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        engine = _engines.get(key, None)
+        if engine is None:
+            engine = _create_engine(hosts, **options)
+            _engines[key] = engine
+    return engine
+
+
+def _create_engine(hosts: str, **options) -> Engine:
+    """
+    Create engine with pool options. SQLite does not use
+    queue pool, so pool options are not applied
+    """
+    if make_url(hosts).get_backend_name() == 'sqlite':
+        engine = create_engine(hosts, echo=False)
+        event.listen(engine, 'connect', _enable_sqlite_foreign_keys)
+        return engine
+
+    pool_options = dict(POOL_OPTIONS)
+    pool_options.update(options)
+    return create_engine(hosts,
+                         echo=False,
+                         pool_pre_ping=True,
+                         **pool_options)
+
+
+def _dispose_engines():
+    """
+    Connections in pool are inherited to forked child process
+    by pre-fork servers like gunicorn. Child process must not use them,
+    so pools are replaced without closing parent's connections
+    """
+    global _engines_lock
+    _engines_lock = threading.Lock()
+    for engine in _engines.values():
+        try:
+            engine.dispose(close=False)
+        except TypeError:
+            # sqlalchemy < 1.4.33 does not have close argument
+            engine.dispose()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_engines)
+
+
+class ReplicaSet:
+    """
+    Replica engines which read queries are routed to in round-robin way.
+    Replica is marked down when connection error is raised from it and
+    it is skipped until retry_interval passes. Then it is probed with
+    light query before reads are routed to it again.
+    After items are written, reads of the writer are pinned to primary
+    for pin_seconds so that written items can be read before replicas
+    catch up with primary. refer to DBConnection.pin_reads
+
+    :param engines:
+        List of replica engines
+    :param retry_interval:
+        seconds to skip replica marked down
+    :param pin_seconds:
+        seconds to read from primary after write
+    """
+    def __init__(self, engines, retry_interval=30, pin_seconds=1):
+        self.engines = engines
+        self.retry_interval = retry_interval
+        self.pin_seconds = pin_seconds
+        self._down_until = {}
+        self._probe_locks = {engine: threading.Lock() for engine in engines}
+        self._counter = itertools.count()
+
+        for engine in engines:
+            event.listen(engine, 'handle_error', self._handle_error(engine))
+
+    def _handle_error(self, engine):
+        def handle_error(context):
+            if context.is_disconnect or \
+                    isinstance(context.original_exception, OperationalError) or \
+                    isinstance(context.sqlalchemy_exception, OperationalError):
+                self.mark_down(engine)
+        return handle_error
+
+    def mark_down(self, engine):
+        self._down_until[engine] = time.monotonic() + self.retry_interval
+
+    def choose(self) -> Optional[Engine]:
         """
-        Close session to cut connection down with database
+        Returns next healthy replica. If every replica is down, returns None
         """
-        self.session.close()
+        now = time.monotonic()
+        size = len(self.engines)
+        for _ in range(size):
+            engine = self.engines[next(self._counter) % size]
+            down_until = self._down_until.get(engine, None)
+            if down_until is None:
+                return engine
+            if down_until <= now and self._probe(engine):
+                return engine
+        return None
+
+    def _probe(self, engine) -> bool:
+        """
+        Check replica marked down with light query. Only one thread
+        probes it and the others skip it while it is probed.
+        Returns whether replica is recovered
+        """
+        lock = self._probe_locks[engine]
+        if not lock.acquire(blocking=False):
+            return False
+        try:
+            if engine not in self._down_until:
+                return True
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+            except Exception:
+                self.mark_down(engine)
+                return False
+            self._down_until.pop(engine, None)
+            return True
+        finally:
+            lock.release()
+
+
+class RoutingSession(Session):
+    """
+    Session which routes read queries to replicas and write queries
+    to primary. Once session writes, following reads of the session
+    are also routed to primary to read own writes. Reads of writer
+    pinned to primary after commit are routed to primary too.
+    If session is read-only, reads are executed in autocommit mode,
+    so there is no transaction to flush and commit.
+
+    :param replicas:
+        ReplicaSet. If it is None, every query is routed to primary(bind)
+    :param pinned:
+        callable which returns whether reads of current writer
+        are pinned to primary. refer to DBConnection.pin_reads
+    """
+    def __init__(self, replicas=None, pinned=None, **options):
+        super().__init__(**options)
+        self.replicas = replicas
+        self.pinned = pinned
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info['pin_primary'] = True
+            return primary
+
+        if self.info.get('pin_primary', False):
+            return primary
+
+        engine = primary
+        replicas = self.replicas
+        is_pinned = self.pinned is not None and self.pinned()
+        if replicas is not None and not is_pinned:
+            replica = replicas.choose()
+            if replica is not None:
+                self.info['replica_used'] = True
+                engine = replica
+
+        # Read-only session does not open transaction
+        if self.info.get('read_only', False):
+            return _autocommit_engine(engine)
+        return engine
+
+
+# Keyword index of items written with orm is maintained on flush
+event.listen(RoutingSession, 'after_flush', index_flushed)
+
+
+_autocommit_engines: Dict[Engine, Engine] = {}
+
+
+def _autocommit_engine(engine: Engine) -> Engine:
+    """
+    Returns autocommit variant of engine. It shares connection pool
+    with engine and isolation level of connection is reset when it is
+    returned to the pool
+    """
+    autocommit = _autocommit_engines.get(engine, None)
+    if autocommit is None:
+        autocommit = engine.execution_options(isolation_level='AUTOCOMMIT')
+        _autocommit_engines[engine] = autocommit
+    return autocommit
+
+
+def _iterate_in_chunks(query,
+                       model: 'MODEL',
+                       chunk_size: int) -> Iterator['MODEL']:
+    """
+    Generator which reads query result in chunks of chunk_size.
+    Each chunk is read with keyset condition on primary key(id > last id)
+    instead of single server-side cursor, so relationships of yielded
+    models can be loaded lazily while iterating. Models of previous chunk
+    are released from the session identity map when they are not referenced.
+
+    :param query:
+        query object which filter is already applied
+    :param model:
+        target model. It must have id primary key
+    :param chunk_size:
+        the number of rows read from database at once
+    """
+    pk = model.id
+    query = query.order_by(None).order_by(pk)
+    last_id = None
+    while True:
+        chunk_query = query
+        if last_id is not None:
+            chunk_query = chunk_query.filter(pk > last_id)
+        chunk = chunk_query.limit(chunk_size).all()
+        if not chunk:
+            return
+
+        for model_inst in chunk:
+            yield model_inst
+
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1].id
+
+
+def _eager_load_options(model: 'MODEL',
+                        relations: Dict[str, Dict],
+                        parent=None) -> List[Any]:
+    """
+    Make loader options of relations. Fields which are not relation
+    of model are skipped.
+
+    :param model:
+        target model
+    :param relations:
+        Dictionary of relation field and its nested relation fields
+    :param parent:
+        loader of parent relation to chain nested loader
+    """
+    options = []
+    for field, nested in relations.items():
+        attr = getattr(model, field, None)
+        prop = getattr(attr, 'property', None)
+        if not isinstance(prop, RelationshipProperty):
+            continue
+
+        # collection is loaded with one more IN query
+        # scalar relation is loaded with join
+        strategy = 'selectinload' if prop.uselist else 'joinedload'
+        if parent is None:
+            loader = {'selectinload': selectinload,
+                      'joinedload': joinedload}[strategy](attr)
+        else:
+            loader = getattr(parent, strategy)(attr)
+
+        options.append(loader)
+        if nested:
+            options.extend(_eager_load_options(prop.mapper.class_, nested, loader))
+
+    return options
+
+
+def _load_only_columns(model: 'MODEL',
+                       fields: List[str],
+                       relations: Optional[Dict[str, Dict]] = None) -> List[Any]:
+    """
+    Resolve column attributes of fields to be loaded. Local columns of
+    relations are added so that relations can be loaded.
+    Returns empty list when any field is not column of model, because
+    the fields do not describe the model and can not be projected.
+
+    :param model:
+        target model
+    :param fields:
+        field names to be loaded
+    :param relations:
+        Dictionary of relation field loaded with model
+    """
+    mapper = model.__mapper__
+    columns = []
+    for field in fields:
+        attr = getattr(model, field, None)
+        if not isinstance(getattr(attr, 'property', None), ColumnProperty):
+            return []
+        columns.append(attr)
+
+    for field in (relations or {}):
+        attr = getattr(model, field, None)
+        prop = getattr(attr, 'property', None)
+        if not isinstance(prop, RelationshipProperty):
+            continue
+        for column in prop.local_columns:
+            columns.append(getattr(model, mapper.get_property_by_column(column).key))
+
+    # remove duplicated columns keeping order
+    unique = []
+    for column in columns:
+        if not any(column is c for c in unique):
+            unique.append(column)
+    return unique
+
+
+def _seek_columns(model: 'MODEL', seek: str) -> List[Any]:
+    """
+    Columns of keyset pagination. id is always the last column
+    to make the order unique.
+
+    :param model:
+        target model
+    :param seek:
+        'id' or 'updated_at'
+    """
+    if seek == 'id':
+        return [model.id]
+    if seek != 'updated_at' or not hasattr(model, seek):
+        raise PaginationError('Seek field is improperly requested',
+                              '%s can not be paginated by %s' % (model, seek))
+    return [getattr(model, seek), model.id]
+
+
+def _seek_filter(columns: List[Any], values: List[Any]):
+    """
+    Make keyset condition which means (c1, c2) > (v1, v2)
+        c1 > v1 OR (c1 = v1 AND c2 > v2)
+    Row value comparison is expanded so that index can be used.
+    """
+    column, value = columns[0], values[0]
+    if len(columns) == 1:
+        return column > value
+    return or_(column > value,
+               and_(column == value,
+                    _seek_filter(columns[1:], values[1:])))
+
+
+def _encode_cursor(values: List[Any]) -> str:
+    """
+    Encode seek column values of last item to opaque cursor token
+    """
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def _decode_cursor(cursor: str, columns: List[Any]) -> List[Any]:
+    """
+    Decode cursor token to seek column values
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if len(values) != len(columns):
+            raise ValueError('cursor does not match seek columns')
+
+        decoded = []
+        for column, value in zip(columns, values):
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            decoded.append(value)
+    except Exception as e:
+        raise PaginationError('Cursor is improperly requested', str(e))
+    return decoded
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """
+    SQLite does not enforce foreign keys and ON DELETE CASCADE
+    unless it is enabled per connection
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def _expand_relation_fields(fields: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Resolve relation fields to list of rows. If relation fields has
+    iterable type(list, tuple, set) field, resolve them one by one
+
+    :param fields:
+        Dictionary of relation field and value
+    """
+    if has_iterable(fields):
+        return make_one_by_one(dict(fields))
+    return [dict(fields)]
+
+
+def _unique_key(table, keys: List[str]) -> List[str]:
+    """
+    Find unique constraint of table which is covered by keys of rows.
+    Returns column names of the constraint.
+
+    :param table:
+        target table
+    :param keys:
+        column names of rows
+    """
+    columns = _find_unique_key(table, keys)
+    if columns is None:
+        raise DBConnectionError('Upsert key is not exists',
+                                '%s does not have unique key in %s' % (table.name, keys))
+    return columns
+
+
+def _find_unique_key(table, keys: List[str]) -> Optional[List[str]]:
+    """
+    Column names of unique constraint of table covered by keys.
+    If there is no such constraint, returns None
+    """
+    for constraint in table.constraints:
+        if not isinstance(constraint, UniqueConstraint):
+            continue
+        columns = [column.name for column in constraint.columns]
+        if columns and all(column in keys for column in columns):
+            return columns
+    return None
+
+
+def _key_of(columns, values) -> Tuple:
+    """
+    Comparable unique key values. Value is converted to type of
+    its column, and string is compared without case and trailing spaces
+    """
+    key = []
+    for column, value in zip(columns, values):
+        if value is not None:
+            try:
+                python_type = column.type.python_type
+            except NotImplementedError:
+                python_type = None
+            if python_type is not None and not isinstance(value, python_type):
+                try:
+                    value = python_type(value)
+                except (TypeError, ValueError):
+                    pass
+            if isinstance(value, str):
+                value = value.rstrip().casefold()
+        key.append(value)
+    return tuple(key)
+
+
+def _matched_ids(query, model: 'MODEL') -> List[int]:
+    """
+    Read ids of items matched with query without loading items
+    """
+    return [row[0] for row in query.with_entities(model.id)]
+
+
+def _dependent_tables(table) -> set:
+    """
+    Names of table and tables whose rows are deleted together
+    with rows of table by foreign keys, recursively
+    """
+    names = {table.name}
+    tables = [table]
+    while tables:
+        referred = tables.pop()
+        for other in referred.metadata.sorted_tables:
+            if other.name in names:
+                continue
+            if any(fk.referred_table is referred and fk.ondelete
+                   for fk in other.foreign_key_constraints):
+                names.add(other.name)
+                tables.append(other)
+    return names
+
+
+def _load_cascades(item):
+    """
+    Load collections of item which are deleted with orm cascade,
+    recursively. Collections with passive_deletes are not loaded
+    by orm when item is deleted
+    """
+    for relation in inspect(type(item)).relationships:
+        if relation.uselist and relation.cascade.delete and relation.passive_deletes:
+            for child in getattr(item, relation.key):
+                _load_cascades(child)
+
+
+def _set_based_response(count: int,
+                        ids: Optional[List[int]] = None) -> Dict[str, Any]:
+    """
+    Make response of set based update or delete
+    """
+    response = {'count': count}
+    if ids is not None:
+        response['ids'] = ids
+    return response
+
+
+def _merge_chunks(results: List[Any]) -> Any:
+    """
+    Merge results of action executed with each filter chunk.
+    Lists are concatenated, generators are chained and responses
+    of set based update or delete are summed
+    """
+    first = results[0]
+    if isinstance(first, dict):
+        response = _set_based_response(sum(result['count'] for result in results))
+        if 'ids' in first:
+            response['ids'] = [id_ for result in results for id_ in result['ids']]
+        return response
+
+    if isinstance(first, list):
+        return [item for result in results for item in result]
+
+    return itertools.chain.from_iterable(results)
+
 
 def as_tuple(models: Dict['MODEL', Mapping]) \
                 -> Tuple['MODEL', Mapping]:
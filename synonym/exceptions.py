@@ -5,7 +5,8 @@ __all__ = ['DBConnectionError',
            'ImproperlyDataStructureError',
            'ResponseModelError',
            'FilterError',
-           'OrderByError']
+           'OrderByError',
+           'PaginationError']
 
 class BaseException(Exception):
 
@@ -43,6 +44,10 @@ class DeleteError(DBConnectionError):
     """sqlalchemy Improperly made order by error"""
 
 
+class PaginationError(DBConnectionError):
+    """Improperly requested page error"""
+
+
 # response error
 class ImproperlyDataStructureError(BaseException):
     """Improperly structured data error"""
@@ -0,0 +1,269 @@
+import sys
+import time
+import typing
+import threading
+
+from .search import normalize_keyword
+from .exceptions import DBConnectionError
+
+
+# Seconds while loaded synonym rules of a project are used
+# before they are loaded again from database
+EXPANSION_TTL = 60
+
+# The number of origins read from database at once when rules are loaded
+EXPANSION_LOAD_CHUNK_SIZE = 1000
+
+
+class SynonymExpander:
+    """
+    In-memory synonym expansion engine. Rules are compiled into a single
+    hash map from normalized term to tuple of its equivalent terms, so
+    expansion is a normalization and a dictionary lookup. Strings are
+    interned and expansion results are shared immutable tuples.
+
+    Two kinds of rules are supported like solr synonym format
+        explicit mapping: 'a,b=>c'
+            a and b are expanded to c. c is not expanded
+        equivalence: 'a,b,c'
+            each of a, b, c is expanded to a, b, c
+    If a term has explicit mapping, the mapping is applied
+    instead of its equivalence.
+
+    Rules are compiled when they are changed and the map is swapped
+    at once, so expand can be called from many threads while rules
+    are added.
+    """
+    def __init__(self):
+        self._mappings: typing.Dict[str, typing.List[str]] = {}
+        self._groups: typing.Dict[str, typing.Set[str]] = {}
+        self._expansions: typing.Dict[str, typing.Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._expansions)
+
+    def add_mapping(self, synonyms: typing.Iterable[str], origin: str):
+        """
+        Add explicit mapping rule. synonyms are expanded to origin
+
+        :param synonyms:
+            terms which are replaced
+        :param origin:
+            term which synonyms are expanded to
+        """
+        with self._lock:
+            self._add_mapping(synonyms, origin)
+            self._compile()
+
+    def add_equivalence(self, terms: typing.Iterable[str]):
+        """
+        Add bidirectional equivalence rule. Each of terms is expanded
+        to all terms. Groups which share a term are merged
+        """
+        with self._lock:
+            self._add_equivalence(terms)
+            self._compile()
+
+    def add_rules(self, lines: typing.Iterable[str]):
+        """
+        Add rules in text format at once.
+        Empty lines and lines starting with # are skipped
+            ex)
+                'synonym1,synonym2=>origin_keyword'
+                'term1,term2,term3'
+        """
+        mappings = []
+        groups = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            if '=>' in line:
+                synonyms, origin = line.split('=>', 1)
+                mappings.append((_split_terms(synonyms), origin.strip()))
+            else:
+                groups.append(_split_terms(line))
+        self.update(mappings, groups)
+
+    def update(self,
+               mappings: typing.Iterable[typing.Tuple[typing.Iterable[str], str]] = (),
+               groups: typing.Iterable[typing.Iterable[str]] = ()):
+        """
+        Add many rules at once. Rules are compiled once
+
+        :param mappings:
+            explicit mapping rules of synonyms and origin
+            ex) [(['a', 'b'], 'c'), ...]
+        :param groups:
+            equivalence rules
+            ex) [['a', 'b', 'c'], ...]
+        """
+        with self._lock:
+            for synonyms, origin in mappings:
+                self._add_mapping(synonyms, origin)
+            for terms in groups:
+                self._add_equivalence(terms)
+            self._compile()
+
+    def expand(self, q: str) -> typing.Tuple[str, ...]:
+        """
+        Expand q to its equivalent terms. q is compared in normalized
+        form. If q does not have rule, q itself is returned
+            ex)
+                'a,b=>c' : expand('A') -> ('c',)
+                'a,b,c'  : expand('b') -> ('a', 'b', 'c')
+        """
+        expansions = self._expansions
+
+        # normalized q is found without normalization
+        expansion = expansions.get(q, None)
+        if expansion is None:
+            expansion = expansions.get(normalize_keyword(q), None)
+        if expansion is None:
+            return (q,)
+        return expansion
+
+    def _add_mapping(self, synonyms, origin):
+        origin = sys.intern(origin)
+        for synonym in synonyms:
+            targets = self._mappings.setdefault(_key(synonym), [])
+            if origin not in targets:
+                targets.append(origin)
+
+    def _add_equivalence(self, terms):
+        group = {sys.intern(term) for term in terms}
+        for term in list(group):
+            group |= self._groups.get(_key(term), set())
+        for term in group:
+            self._groups[_key(term)] = group
+
+    def _compile(self):
+        """
+        Merge rules into single map of normalized term and expansion
+        """
+        expansions = {}
+        for key, group in self._groups.items():
+            expansions[key] = tuple(sorted(group))
+        for key, targets in self._mappings.items():
+            expansions[key] = tuple(targets)
+
+        # Equal expansions share one tuple
+        shared = {}
+        self._expansions = {key: shared.setdefault(expansion, expansion)
+                            for key, expansion in expansions.items()}
+
+
+def load_expander(db_client,
+                  pjt_id: int,
+                  bidirectional: bool = False,
+                  chunk_size: int = EXPANSION_LOAD_CHUNK_SIZE) -> SynonymExpander:
+    """
+    Load origin and synonym rules of project from database.
+    Origins are read in chunks, so memory of loading is kept flat
+
+    :param db_client:
+        DBClient
+    :param pjt_id:
+        project id
+    :param bidirectional:
+        If it is False, synonyms of origin are expanded to origin(synonyms=>origin).
+        Otherwise origin and its synonyms are equivalent
+    :param chunk_size:
+        the number of origins read at once
+    """
+    from .response import OriginResponse
+
+    request_params = {
+        'pjt_id': pjt_id,
+        'where': [('pjt_id', 'on_off')],
+        'on_off': {'pjt_id': True},
+        'yield_per': chunk_size,
+        'response_model': typing.Iterator[OriginResponse]
+    }
+    response = db_client.origin('find', **request_params)
+    if response['status'] != 'success':
+        raise DBConnectionError(response['message'], response['details'])
+
+    mappings = []
+    groups = []
+    for origin in response['data']:
+        synonyms = [synonym['synm_keyword'] for synonym in origin['synonym']]
+        if not synonyms:
+            continue
+        if bidirectional:
+            groups.append([origin['origin_keyword']] + synonyms)
+        else:
+            mappings.append((synonyms, origin['origin_keyword']))
+
+    expander = SynonymExpander()
+    expander.update(mappings, groups)
+    return expander
+
+
+class ExpanderRegistry:
+    """
+    Expanders of projects. Expander is loaded when project is expanded
+    for the first time and loaded again after ttl seconds. While it is
+    loaded again, the previous expander is kept in use by other threads.
+
+    :param db_client:
+        DBClient
+    :param ttl:
+        seconds while loaded expander is used
+    """
+    def __init__(self, db_client, ttl: float = EXPANSION_TTL):
+        self.db_client = db_client
+        self.ttl = ttl
+        self._expanders: typing.Dict[typing.Tuple, typing.Tuple[SynonymExpander, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, pjt_id: int, bidirectional: bool = False) -> SynonymExpander:
+        """
+        Returns expander of project
+
+        :param pjt_id:
+            project id
+        :param bidirectional:
+            refer to load_expander
+        """
+        key = (pjt_id, bidirectional)
+        entry = self._expanders.get(key, None)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+
+        # Expired expander is used while another thread loads it again
+        if entry is not None:
+            if not self._lock.acquire(blocking=False):
+                return entry[0]
+        else:
+            self._lock.acquire()
+
+        try:
+            entry = self._expanders.get(key, None)
+            if entry is not None and entry[1] > time.monotonic():
+                return entry[0]
+
+            expander = load_expander(self.db_client, pjt_id, bidirectional)
+            self._expanders[key] = (expander, time.monotonic() + self.ttl)
+            return expander
+        finally:
+            self._lock.release()
+
+    def invalidate(self, pjt_id: typing.Optional[int] = None):
+        """
+        Drop loaded expanders of project, or every project if pjt_id is None
+        """
+        with self._lock:
+            for key in list(self._expanders):
+                if pjt_id is None or key[0] == pjt_id:
+                    del self._expanders[key]
+
+
+def _key(term: str) -> str:
+    return sys.intern(normalize_keyword(term))
+
+
+def _split_terms(terms: str) -> typing.List[str]:
+    return [term.strip() for term in terms.split(',') if term.strip()]
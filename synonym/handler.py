@@ -1,5 +1,6 @@
 import abc
 import typing
+import collections.abc
 
 from typing import (
     Optional,
@@ -9,6 +10,7 @@ from typing import (
     Any,
     Mapping,
     Callable,
+    Iterator
 )
 from .connections import (
     Connection,
@@ -16,16 +18,25 @@ from .connections import (
     ElasticsearchConnection
 )
 from .model import ModelBase
-from .response import Response
+from .response import Response, compile_serializer
+from .types import Page
+from .cache import ResultCache, SingleFlight, make_key, related_models
 from .exceptions import (
     ResponseModelError,
     DBConnectionError,
     DeserializerError,
     ResponseError
 )
+from pydantic import BaseModel
 from pydantic.error_wrappers import ValidationError
 
 
+# Default size and ttl(seconds) of find response cache.
+# Cache is disabled by default and enabled with DB_CACHE_SIZE environment variable
+CACHE_SIZE = 0
+CACHE_TTL = 5
+
+
 class ClientHandler:
 
     DEFAULT_CONNECTION_CLASS = Connection
@@ -80,18 +91,23 @@ class ClientHandler:
                 'message': error.error,
                 'details': error.info}
 
-    def evoke_sucess_response(self, response):
+    def evoke_sucess_response(self, response, pagination=None):
         """
         It generate return response when request is success.
         Returns dictionary which is specified by developer
 
         :param response(list or dict):
             It is responses that has gone through all the process
+        :param pagination(dict):
+            page, size, next_cursor and total of paginated response
         """
-        return {'status': 'success',
-                'data': response,
-                'message': '',
-                'details': ''}
+        result = {'status': 'success',
+                  'data': response,
+                  'message': '',
+                  'details': ''}
+        if pagination is not None:
+            result['pagination'] = pagination
+        return result
 
     def _resolve_response(self, resp):
         raise NotImplementedError
@@ -112,6 +128,11 @@ class DBHandler(ClientHandler):
         Connection class to be linked
     :param options
         Additional arguments
+        validate_response(bool): validate responses with pydantic response model.
+                                 It is slow, so use it for debugging
+        cache_size(int): Maximum number of cached find responses.
+                         If it is 0, find responses are not cached. Default is 0
+        cache_ttl(float): seconds while cached find response is valid
     """
     DEFAULT_CONNECTION_CLASS = DBConnection
 
@@ -123,6 +144,19 @@ class DBHandler(ClientHandler):
         connection_class = connection_class or self.DEFAULT_CONNECTION_CLASS
         super().__init__(hosts, connection_class, **options)
 
+        # Validate responses with pydantic response model for debugging.
+        # Otherwise responses are converted by compiled serializer
+        self.validate_response = options.get('validate_response', False)
+
+        # Identical concurrent finds wait for the first one and share its response
+        self.single_flight = SingleFlight()
+
+        # Cache of find responses. It is disabled when cache_size is 0
+        cache_size = options.get('cache_size', CACHE_SIZE)
+        self.cache = None
+        if cache_size:
+            self.cache = ResultCache(cache_size, options.get('cache_ttl', CACHE_TTL))
+
     def perform(self,
                 action: str,
                 *,
@@ -172,19 +206,109 @@ class DBHandler(ClientHandler):
             If it is True, response is converted to dictionary format
         :param options:
             Additional arguments for connection methods
+            validate(bool): If it is True, responses are validated by pydantic
+                            response model. Default is validate_response option
+                            of the handler
+            load_relations(dict): relations loaded eagerly with found items.
+                            It is resolved from response model if not specified.
+            load_columns(list): columns loaded from database. It is resolved from
+                            response model if not specified and response_preprocess
+                            is None.
+            yield_per(int): If it is specified with find action, data of response
+                            is generator and response_model must be wrapped by
+                            typing.Iterator. Session is kept until the generator
+                            is exhausted.
+        """
+        is_stream = bool(options.get('yield_per', None))
+        options.setdefault('validate', self.validate_response)
+
+        # Relations nested in response model are loaded eagerly with found items
+        # so that deserializing them does not fire lazy load per item
+        if action == 'find' and response_model is not None:
+            options.setdefault('load_relations',
+                               _resolve_nested_fields(response_model))
+
+            # Only columns in response model are loaded.
+            # Pre-processor can access any attributes of found items,
+            # so columns are not projected when it is specified
+            if response_preprocess is None:
+                options.setdefault('load_columns',
+                                   _resolve_scalar_fields(response_model))
+
+        # Find response is served from cache if it is cached.
+        # Streamed response and pydantic model response are not cached
+        # nor shared between concurrent requests. Reads pinned to primary
+        # after write must read own writes, so they are not cached either
+        is_read = action == 'find'
+        if not is_read or is_stream or not is_json or self.connection.reads_primary():
+            return self._execute(action, model, mapping, relations, response_model,
+                                 is_flush, response_preprocess, response_postprocess,
+                                 is_json, None, **options)
+
+        cache_key = make_key(model,
+                             options,
+                             response_model,
+                             response_preprocess,
+                             response_postprocess)
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Identical concurrent finds share single query and its response
+        return self.single_flight.do(
+                    cache_key,
+                    lambda: self._execute(action, model, mapping, relations, response_model,
+                                          is_flush, response_preprocess, response_postprocess,
+                                          is_json, cache_key, **options))
+
+    def _execute(self,
+                 action,
+                 model,
+                 mapping,
+                 relations,
+                 response_model,
+                 is_flush,
+                 response_preprocess,
+                 response_postprocess,
+                 is_json,
+                 cache_key,
+                 **options):
         """
+        Execute action on connection and make response. refer to perform method
 
+        :param cache_key:
+            key of find response. If it is not None and cache is enabled,
+            response is cached with it
+        """
         # db connection interface to communicate with database
         # class <synonym.connections.DBconnection>
         conn: DBConnection = self.connection
+        is_stream = bool(options.get('yield_per', None))
+        is_read = action == 'find'
+
+        # Find is executed without transaction, so it skips flush and commit.
+        # Write and following reads in the request are executed on primary
+        if is_read:
+            conn.read_only()
+        else:
+            conn.pin_primary()
 
         # get action from connection, insert, find, delete, update
         action = self._get_action(action, conn)
         try:
             response = action(model, mapping, relations, **options)
-            if is_flush:
+            if is_flush and not is_stream and not is_read:
                 conn.flush()
 
+            # Relations and columns of response model are loaded with found
+            # items, so session is closed and its connection is returned to
+            # the pool before serialization. Pre-processor can access any
+            # attributes of items, so session is kept when it is specified
+            if is_read and not is_stream and response_model is not None \
+                    and response_preprocess is None:
+                conn.close()
+
             # Make the success response
             # If error is raised, context change to except clause
             # and make failure reponse
@@ -195,8 +319,25 @@ class DBHandler(ClientHandler):
                                         is_json,
                                         **options)
 
+            # Streamed response is read from database lazily,
+            # so session is closed when data is consumed
+            if is_stream:
+                result['data'] = _close_after(result['data'], conn)
+                return result
+
             # If the request is successful, commit the result
-            conn.commit()
+            if not is_read:
+                conn.commit()
+
+                # written items are cached in responses of related models
+                if self.cache is not None:
+                    self.cache.invalidate(related_models(model),
+                                          options.get('pjt_id', None))
+            elif cache_key is not None and self.cache is not None:
+                self.cache.set(cache_key,
+                               result,
+                               related_models(model),
+                               options.get('pjt_id', None))
         except Exception as error:
             """control error"""
             conn.rollback()
@@ -241,6 +382,11 @@ class DBHandler(ClientHandler):
             Additional arguments for connection methods
         :return:
         """
+        # Pagination information is lost after deserialization
+        pagination = None
+        if isinstance(response, Page):
+            pagination = response.pagination
+
         try:
             response = _deserialize_response(response,
                                              response_model,
@@ -252,9 +398,19 @@ class DBHandler(ClientHandler):
             raise ResponseError(error.error, error.info)
 
         # If response deserialization is successful, evoke the success response
-        result = self.evoke_sucess_response(response)
+        result = self.evoke_sucess_response(response, pagination)
         return result
 
+    def cache_stats(self) -> Dict[str, int]:
+        """
+        Counters of find response cache and single flight.
+        hits, misses, evictions, shared...
+        """
+        stats = {'shared': self.single_flight.shared}
+        if self.cache is not None:
+            stats.update(self.cache.stats())
+        return stats
+
     def _get_action(self, action, conn):
         """
         Get action to process request from connection instance.
@@ -282,6 +438,25 @@ class DBHandler(ClientHandler):
         self._connection.close()
 
 
+def _close_after(data: Iterator[Any], conn: DBConnection) -> Iterator[Any]:
+    """
+    Wrap the streamed data so that connection is closed after all
+    data is consumed or error is raised while consuming it.
+
+    :param data:
+        generator of deserialized response
+    :param conn:
+        instance <synonym.connections.DBconnection>
+    """
+    try:
+        yield from data
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
 def _deserialize_response(
                       response: Union[ModelBase, List[ModelBase]],
                       response_model: Optional['Response']=None,
@@ -322,8 +497,10 @@ def _deserialize_response(
     response_model, origin = _resolve_response_model(response_model)
 
     # If origin is not None, that is, origin was wrapped by typing module,
-    # origin must be the same type with response
-    if origin and origin != type(response):
+    # origin must be the same type with response.
+    # Iterator origin is abstract type and Page is subclass of list,
+    # so check it with isinstance
+    if origin and not isinstance(response, origin):
         raise DeserializerError('Response type Error',
                                 '%s is different type with %s' % (origin, response))
 
@@ -338,7 +515,8 @@ def _deserialize_response(
         response = _apply_response_model(response,
                                          response_model,
                                          origin,
-                                         json)
+                                         json,
+                                         options.get('validate', False))
         if response_postprocess:
             response = response_postprocess(response, **options)
     except Exception as e:
@@ -377,10 +555,58 @@ def _resolve_response_model(response_model):
     return response_model, origin
 
 
+def _resolve_nested_fields(response_model, depth=3):
+    """
+    Resolve fields of nested pydantic model in response model.
+    Returns dictionary of field name and its nested fields
+    ex)
+        OriginResponse -> {'synonym': {}}
+
+    :param response_model:
+        pydantic response model. It can be wrapped from typing module.
+    :param depth:
+        Maximum depth of nested model to resolve
+    """
+    response_model, _ = _resolve_response_model(response_model)
+    nested = {}
+    if depth <= 0 or not hasattr(response_model, '__fields__'):
+        return nested
+
+    for name, field in response_model.__fields__.items():
+
+        # type_ is inner type when field is wrapped like List[SynonymResponse]
+        field_type = field.type_
+        if isinstance(field_type, type) and issubclass(field_type, BaseModel):
+            nested[name] = _resolve_nested_fields(field_type, depth - 1)
+
+    return nested
+
+
+def _resolve_scalar_fields(response_model):
+    """
+    Resolve field names of response model except nested pydantic model fields.
+
+    :param response_model:
+        pydantic response model. It can be wrapped from typing module.
+    """
+    response_model, _ = _resolve_response_model(response_model)
+    if not hasattr(response_model, '__fields__'):
+        return []
+
+    fields = []
+    for name, field in response_model.__fields__.items():
+        field_type = field.type_
+        if isinstance(field_type, type) and issubclass(field_type, BaseModel):
+            continue
+        fields.append(name)
+    return fields
+
+
 def _apply_response_model(responses,
                           reponse_model,
                           origin,
-                          json: Optional[bool]=True):
+                          json: Optional[bool]=True,
+                          validate: Optional[bool]=False):
     """
     Apply sqlalchemy response model to pydantic response model to
     convert to dictionary format in very simple way.
@@ -392,27 +618,58 @@ def _apply_response_model(responses,
         refer to make_response method
     :param origin:
         wrapping type from typing module, it can be list, dict..
+    :param validate:
+        If it is True, responses are validated by pydantic response model.
+        Otherwise they are converted by compiled serializer of response model
+        when json is True
     """
-    result = []
     if responses and origin is None and \
             isinstance(responses, list):
         raise Exception
 
+    # If response model is not specified, response is returned as it is.
+    # ex) result of set based update or delete
+    if reponse_model is None:
+        return responses
+
+    convert = _response_converter(reponse_model, json, validate)
+
+    # If response is streamed, deserialize it lazily
+    if origin is collections.abc.Iterator:
+        return (convert(response) for response in responses)
+
     # If response have a only one result
     if not isinstance(responses, list):
-        result = reponse_model.from_orm(responses)
-        if json:
-            result = result.dict()
-        return result
+        return convert(responses)
 
     # If response have multiple results
-    for response in responses:
+    return [convert(response) for response in responses]
+
+
+def _response_converter(reponse_model,
+                        json: Optional[bool]=True,
+                        validate: Optional[bool]=False):
+    """
+    Returns function converting single orm model instance.
+    Compiled serializer is used unless validation or pydantic
+    model instance is requested
+
+    :param reponse_model:
+        refer to make_response method
+    :param json:
+        refer to perform method
+    :param validate:
+        refer to _apply_response_model
+    """
+    if json and not validate:
+        return compile_serializer(reponse_model)
+
+    def convert(response):
         response = reponse_model.from_orm(response)
         if json:
             response = response.dict()
-        result.append(response)
-
-    return result
+        return response
+    return convert
 
 
 class ESHandler(ClientHandler):
@@ -4,6 +4,8 @@ from sqlalchemy import (
     String,
     DateTime,
     ForeignKey,
+    UniqueConstraint,
+    Index,
     func
 )
 from sqlalchemy.orm import relationship
@@ -23,55 +25,130 @@ class User(ModelBase):
 
 class ProjectUser(ModelBase):
     __tablename__ = 'tbl_project_user_mocking'
+    __table_args__ = (
+        # projects of user
+        Index('ix_project_user_user_id', 'user_id'),
+    )
     id = Column(Integer, autoincrement=True, primary_key=True)
-    user_id = Column(Integer, ForeignKey('tbl_user_mocking.id'))
-    pjt_id = Column(Integer, ForeignKey('tbl_pjt_mocking.id'))
+    user_id = Column(Integer, ForeignKey('tbl_user_mocking.id', ondelete='CASCADE'))
+    pjt_id = Column(Integer, ForeignKey('tbl_pjt_mocking.id', ondelete='CASCADE'))
     project = relationship('Project', uselist=False, cascade="all,delete")
 
 
+# Keyword fields listed in __search_fields__ are searched with index.
+# MySQL uses FULLTEXT index with ngram parser which handles Korean
+# and the other databases use KeywordNgram table.
+def _fulltext_index(name, field):
+    return Index(name, field, mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+# Normalized copy of keyword field is written on insert, so keyword is
+# looked up in normalized form with index regardless of collation.
+# Columns are listed in __normalized_fields__ with their keyword fields
+# and updated together with them. refer to synonym.search.normalize_fields
+def _normalized(field):
+    def default(context):
+        from .search import normalize_keyword
+
+        value = context.get_current_parameters().get(field, None)
+        return normalize_keyword(value) if value is not None else None
+    return default
+
+
 class Project(ModelBase):
     __tablename__ = 'tbl_pjt_mocking'
+    __table_args__ = (
+        _fulltext_index('ft_pjt_name', 'pjt_name'),
+    )
+    __search_fields__ = ('pjt_name',)
     id = Column(Integer, autoincrement=True, primary_key=True)
     pjt_name = Column(String(128), nullable=False, unique=True)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(String(64), server_default=func.now(), onupdate=func.now())
 
-    pjt_user = relationship('ProjectUser', uselist=True, cascade="all,delete")
-    synonym = relationship('Synonym', uselist=True, cascade="all,delete")
-    origin = relationship('Origin', uselist=True, cascade="all,delete")
-    category = relationship('Category', uselist=True, cascade="all,delete")
+    pjt_user = relationship('ProjectUser', uselist=True, cascade="all,delete",
+                            passive_deletes=True)
+    synonym = relationship('Synonym', uselist=True, cascade="all,delete",
+                           passive_deletes=True)
+    origin = relationship('Origin', uselist=True, cascade="all,delete",
+                          passive_deletes=True)
+    category = relationship('Category', uselist=True, cascade="all,delete",
+                            passive_deletes=True)
 
 
 class Category(ModelBase):
     __tablename__ = 'tbl_category_mocking'
+    __table_args__ = (
+        _fulltext_index('ft_category_name', 'category_name'),
+    )
+    __search_fields__ = ('category_name',)
     id = Column(Integer, autoincrement=True, primary_key=True)
     category_name = Column(String(128), nullable=False, unique=True)
-    pjt_id = Column(Integer, ForeignKey('tbl_pjt_mocking.id'))
+    pjt_id = Column(Integer, ForeignKey('tbl_pjt_mocking.id', ondelete='CASCADE'))
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), nullable=True)
-    origin = relationship('Origin', uselist=True, cascade="all,delete")
-    synonym = relationship('Synonym', uselist=True, cascade="all,delete")
+    origin = relationship('Origin', uselist=True, cascade="all,delete",
+                          passive_deletes=True)
+    synonym = relationship('Synonym', uselist=True, cascade="all,delete",
+                           passive_deletes=True)
 
 
 class Origin(ModelBase):
     __tablename__ = 'tbl_origin_mocking'
+    __table_args__ = (
+        UniqueConstraint('category_id', 'origin_keyword', name='uq_origin_category_keyword'),
+        _fulltext_index('ft_origin_keyword', 'origin_keyword'),
+        # origins of project and category
+        Index('ix_origin_pjt_category', 'pjt_id', 'category_id'),
+    )
+    __search_fields__ = ('origin_keyword',)
     #하나의 category에 하나의 origin constrained 걸
     id = Column(Integer, autoincrement=True, primary_key=True)
-    category_id = Column(Integer, ForeignKey('tbl_category_mocking.id'), nullable=False)
-    pjt_id = Column(Integer, ForeignKey('tbl_pjt_mocking.id'), nullable=False)
+    category_id = Column(Integer, ForeignKey('tbl_category_mocking.id', ondelete='CASCADE'), nullable=False)
+    pjt_id = Column(Integer, ForeignKey('tbl_pjt_mocking.id', ondelete='CASCADE'), nullable=False)
     origin_keyword = Column(String(128), nullable=False)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), nullable=True)
     synonym = relationship('Synonym', uselist=True, cascade="all,delete",
-                           foreign_keys='[Synonym.origin_id]')
+                           foreign_keys='[Synonym.origin_id]',
+                           passive_deletes=True)
 
 
 class Synonym(ModelBase):
     __tablename__ = 'tbl_synonym_mocking'
+    __table_args__ = (
+        # synonyms of origin are read with origin_id prefix of unique key
+        UniqueConstraint('origin_id', 'synm_keyword', name='uq_synonym_origin_keyword'),
+        # origins of synonym keyword(reverse lookup)
+        Index('ix_synonym_pjt_keyword', 'pjt_id', 'synm_keyword'),
+        # origins of synonym keyword in normalized form
+        Index('ix_synonym_pjt_keyword_norm', 'pjt_id', 'synm_keyword_norm'),
+    )
+    __normalized_fields__ = {'synm_keyword_norm': 'synm_keyword'}
     # pjt_id, category_id 같이
     id = Column(Integer, autoincrement=True, primary_key=True)
-    pjt_id = Column(Integer, ForeignKey('tbl_pjt_mocking.id'))
-    category_id = Column(Integer, ForeignKey('tbl_category_mocking.id'))
-    origin_id = Column(Integer, ForeignKey('tbl_origin_mocking.id'))
+    pjt_id = Column(Integer, ForeignKey('tbl_pjt_mocking.id', ondelete='CASCADE'))
+    category_id = Column(Integer, ForeignKey('tbl_category_mocking.id', ondelete='CASCADE'))
+    origin_id = Column(Integer, ForeignKey('tbl_origin_mocking.id', ondelete='CASCADE'))
     synm_keyword = Column(String(128), nullable=False)
+    synm_keyword_norm = Column(String(128), default=_normalized('synm_keyword'))
     created_at = Column(DateTime, default=func.now(), nullable=False)
+
+    # Origin.synonym writes origin_id, so this side is read only
+    origin = relationship('Origin', uselist=False, viewonly=True)
+
+
+class KeywordNgram(ModelBase):
+    """
+    N-gram inverted index of keyword fields for databases which
+    does not have ngram full-text index. ex) sqlite
+    It is maintained on insert, update and delete. refer to synonym.search
+    """
+    __tablename__ = 'tbl_keyword_ngram_mocking'
+    __table_args__ = (
+        Index('ix_keyword_ngram_doc', 'field', 'doc_id'),
+    )
+    # ex) Origin.origin_keyword
+    field = Column(String(64), primary_key=True)
+    gram = Column(String(8), primary_key=True)
+    doc_id = Column(Integer, primary_key=True, autoincrement=False)
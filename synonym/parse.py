@@ -5,7 +5,9 @@ from typing import (
     Tuple,
     Dict,
     Union,
-    Any
+    Any,
+    IO,
+    Iterable
 )
 from pydantic import BaseModel
 from openpyxl import load_workbook, Workbook
@@ -16,17 +18,24 @@ class ExcelWriter:
     Excel sheet Writer class. Provide the writer method
     per column, row, cell
 
+    If write_only is True, workbook is created in write-only mode.
+    Rows are appended to the sheet in order and flushed while writing,
+    so memory stays constant. Only write_row is available in this mode.
+
     :param path:
-        location of xlsx file
+        location of xlsx file or file-like object(buffer)
     :param name:
         sheet name
+    :param write_only:
+        create workbook in write-only mode
 
     """
 
-    def __init__(self, path, name=None):
+    def __init__(self, path, name=None, write_only=False):
 
-        self._wb = Workbook(name)
-        self._create_sheet()
+        self.write_only = write_only
+        self._wb = Workbook(write_only=write_only)
+        self._create_sheet(name)
         self.path = path
         self.row = 1
         self.col = 1
@@ -57,6 +66,11 @@ class ExcelWriter:
             row values in order
 
         """
+        if self.write_only:
+            self.sheet.append(values)
+            self.row += 1
+            return
+
         for value in values:
             self.write_cell(self.row, self.col, value)
             self.col += 1
@@ -75,6 +89,8 @@ class ExcelWriter:
             value to be entered
 
         """
+        if self.write_only:
+            raise TypeError('Cell can not be written in write-only mode, use write_row')
         self.sheet.cell(x, y, v)
 
     def _create_sheet(self, name=None):
@@ -86,7 +102,10 @@ class ExcelWriter:
             Sheet name
 
         """
-        if name is None:
+        # write-only workbook does not have active sheet
+        if self.write_only:
+            sheet = self._wb.create_sheet(name)
+        elif name is None:
             sheet = self._wb.active
         else:
             sheet = self._wb.create_sheet(name)
@@ -95,6 +114,7 @@ class ExcelWriter:
     def save(self):
         """
         Method for saving file in the directiory specified by developer.
+        path can be file-like object
         """
         self._wb.save(self.path)
 
@@ -102,10 +122,14 @@ class ExcelReader:
     """
     Excel reader class is iterator and read&parse file
     in row unit. Only read first sheet in file.
+    Workbook is opened in read-only mode so rows are streamed
+    from the file once instead of being loaded in memory.
 
     """
     def __init__(self, path):
-        self._wb = load_workbook(path)
+        self._wb = load_workbook(path, read_only=True, data_only=True)
+        self._header = None
+        self._size = None
 
     @property
     def active(self):
@@ -118,42 +142,41 @@ class ExcelReader:
     def header(self):
         """
         Return first row in sheet. Assume the first row is header
-        and extract it
+        and extract it without loading the body
         """
-        return self.rows[0]
+        if self._header is None:
+            rows = self.active.iter_rows(min_row=1, max_row=1, values_only=True)
+            self._header = list(next(rows, ()))
+        return self._header
 
     @property
     def body(self):
         """
-        Everything except the first row.
-        """
-        return self.rows[1:]
-
-    @property
-    def rows(self):
+        Generator of every row except the first row.
+        Empty rows left in sheet dimensions are skipped
         """
-        Return all rows in sheet in the form of double list.
+        rows = self.active.iter_rows(min_row=2, values_only=True)
+        return (row for row in rows if any(v is not None for v in row))
 
-        :return(list[list]):
-        """
-        return list(self.active.rows)
     @property
     def size(self):
         """
-        The number of rows except the first row
+        The number of rows in body. Rows are read once to count them,
+        so it is the same with the number of rows body yields
         """
-        return len(self.body)
+        if self._size is None:
+            self._size = sum(1 for _ in self.body)
+        return self._size
 
     def __iter__(self):
-        self.idx = 0
-        return self
+        return self.body
 
-    def __next__(self):
-        if self.idx >= self.size:
-            raise StopIteration
-        r = [cell.value for cell in self.body[self.idx]]
-        self.idx += 1
-        return r
+    def close(self):
+        """
+        Close the workbook. read-only workbook keep the file open
+        until it is closed
+        """
+        self._wb.close()
 
 class _BaseAdater:
     """
@@ -187,7 +210,8 @@ class _BaseAdater:
         the file in desired location.
 
         :param data:
-            data which will be processed
+            iterable of data which will be processed.
+            It can be generator, so it must be consumed only once
 
         """
         raise NotImplementedError
@@ -210,11 +234,14 @@ class SynonymExcelAdater(_BaseAdater):
         # _      : Serial number
         # k(str) : origin keyword
         # s(list): synonyms
-        for _, k, s in reader:
+        try:
+            for _, k, s in reader:
 
-            if k not in synonym_dic:
-                synonym_dic[k] = []
-            synonym_dic[k].append(s)
+                if k not in synonym_dic:
+                    synonym_dic[k] = []
+                synonym_dic[k].append(s)
+        finally:
+            reader.close()
 
         response = [output_model(
                             origin_keyword=k,
@@ -224,7 +251,7 @@ class SynonymExcelAdater(_BaseAdater):
         return response
 
     def export(self, data):
-        wirter = ExcelWriter(self.path)
+        wirter = ExcelWriter(self.path, write_only=True)
 
         # First row is header
         wirter.write_row(
@@ -278,8 +305,8 @@ class SynonymTextAdapter(_BaseAdater):
     def export(self, datum):
         """
 
-        :param datum(list):
-            data which will be processed
+        :param datum(iterable):
+            data which will be processed. It can be generator
             ex)
                 datum = [{
                             "origin_keyword": k1,
@@ -301,6 +328,13 @@ class SynonymTextAdapter(_BaseAdater):
                         .
                         ]
         """
+        # path can be file-like object(binary buffer)
+        if _is_buffer(self.path):
+            for data in datum:
+                line = self._stick_line(data)
+                self.path.write((line + '\n').encode('utf-8'))
+            return
+
         with open(self.path, 'w', encoding='utf-8') as file:
             for data in datum:
 
@@ -408,22 +442,37 @@ class FileParser:
     :param executor_class
         Sinker or Exporter
     :param data
-        It is only specified when Export the data in file
+        It is only specified when Export the data in file.
+        It can be list or generator of data
     :param output_model
         pydantic model
+    :param ext
+        file extension('.txt', '.xlsx'). It must be specified when path
+        is file-like object(in-memory or spooled buffer) instead of file path.
+
+    ==== In case of exporting to buffer
+    buffer = tempfile.SpooledTemporaryFile()
+    parser = FileParser(path=buffer, executor_class=Exporter, data=...., ext='.xlsx')
+    parser.process()
 
     """
     def __init__(self,
-                 path: str,
+                 path: Union[str, IO[bytes]],
                  executor_class: Optional[Union[Sinker, Exporter]],
-                 data: Optional[List[Dict[str, Any]]]=None,
-                 output_model: Optional[BaseModel]=None
+                 data: Optional[Iterable[Dict[str, Any]]]=None,
+                 output_model: Optional[BaseModel]=None,
+                 ext: Optional[str]=None
                  ):
 
-        _, ext = os.path.splitext(path)
-        if os.path.isdir(path) or ext not in ('.txt', '.xlsx'):
-            raise ValueError('%s value error' % path,
-                             'File must be <txt or excel> and <not directory>')
+        if _is_buffer(path):
+            if ext not in ('.txt', '.xlsx'):
+                raise ValueError('%s value error' % ext,
+                                 'Extension must be specified <txt or excel> with buffer')
+        else:
+            _, ext = os.path.splitext(path)
+            if os.path.isdir(path) or ext not in ('.txt', '.xlsx'):
+                raise ValueError('%s value error' % path,
+                                 'File must be <txt or excel> and <not directory>')
 
         self._path = path
         self.handler = executor_class(path, ext, data, output_model)
@@ -442,7 +491,18 @@ class FileParser:
 
     def remove(self):
         """
-        Remove the file when file is not needed after processing
+        Remove the file when file is not needed after processing.
+        If path is buffer, close it.
         """
+        if _is_buffer(self.path):
+            self.path.close()
+            return
+
+        os.remove(self.path)
+
 
-        os.remove(self.path)
\ No newline at end of file
+def _is_buffer(path) -> bool:
+    """
+    Check whether path is file-like object instead of file path
+    """
+    return hasattr(path, 'write') and hasattr(path, 'seek')
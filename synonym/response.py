@@ -1,6 +1,8 @@
 import re
 import typing
+import operator
 from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
 from datetime import datetime
 
 class Response(BaseModel):
@@ -54,6 +56,16 @@ class SynonymResponse(Response):
     synm_keyword: str
     created_at: datetime
 
+class OriginKeywordResponse(Response):
+    id: int
+    category_id: int
+    origin_keyword: str
+
+class SynonymLookupResponse(Response):
+    id: int
+    synm_keyword: str
+    origin: OriginKeywordResponse
+
 class OriginResponse(Response):
 
     id: int
@@ -65,6 +77,97 @@ class OriginResponse(Response):
     synonym: typing.List[SynonymResponse]
 
 
+_serializers = {}
+
+
+def compile_serializer(response_model) -> typing.Callable[[typing.Any], typing.Dict[str, typing.Any]]:
+    """
+    Compile response model to function which converts orm model instance
+    to dictionary straight without pydantic validation. Result is the same
+    with response_model.from_orm(obj).dict() for well-formed orm models.
+    It is compiled once per response model and cached.
+
+    Fields are read with single attribute getter and only fields
+    which need conversion are converted.
+    ex) nested response model, datetime stored in string column
+
+    :param response_model:
+        pydantic response model
+    """
+    serializer = _serializers.get(response_model, None)
+    if serializer is not None:
+        return serializer
+
+    names = []
+    converters = []
+    for name, field in response_model.__fields__.items():
+        names.append(name)
+        converter = _field_converter(field)
+        if converter is not None:
+            converters.append((name, converter))
+
+    names = tuple(names)
+    converters = tuple(converters)
+    getter = operator.attrgetter(*names)
+    if len(names) == 1:
+        # attrgetter returns value itself when it has a single attribute
+        single = getter
+        getter = lambda obj: (single(obj),)
+
+    def serializer(obj):
+        result = dict(zip(names, getter(obj)))
+        for name, converter in converters:
+            value = result[name]
+            if value is not None:
+                result[name] = converter(value)
+        return result
+
+    _serializers[response_model] = serializer
+    return serializer
+
+
+def _field_converter(field):
+    """
+    Make converter of field value. Returns None if value
+    does not need to be converted
+    """
+    field_type = field.type_
+    is_many = field.shape != SHAPE_SINGLETON
+
+    if isinstance(field_type, type) and issubclass(field_type, BaseModel):
+        nested = compile_serializer(field_type)
+        if is_many:
+            return lambda values: [nested(value) for value in values]
+        return nested
+
+    converter = _TYPE_CONVERTERS.get(field_type, None)
+    if converter is None or is_many:
+        return None
+    return converter
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def _caster(tp):
+    def cast(value):
+        if type(value) is tp:
+            return value
+        return tp(value)
+    return cast
+
+
+_TYPE_CONVERTERS = {
+    datetime: _to_datetime,
+    int: _caster(int),
+    str: _caster(str),
+    float: _caster(float)
+}
+
+
 class SynonymFileOutput(BaseModel):
     origin_keyword: str
     synm_keyword: typing.List[str]
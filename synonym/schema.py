@@ -0,0 +1,374 @@
+import typing
+
+from sqlalchemy import (
+    Index,
+    MetaData,
+    UniqueConstraint,
+    inspect,
+    select,
+    text,
+    and_
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable, CreateColumn
+
+from .model import (
+    ModelBase,
+    Project,
+    ProjectUser,
+    Category,
+    Origin,
+    Synonym
+)
+from .exceptions import DBConnectionError
+from .search import (
+    reindex_keywords,
+    renormalize_fields,
+    search_fields,
+    normalized_fields,
+    uses_fulltext
+)
+
+
+# Filter columns of list endpoints. Each of them must be covered by
+# leading columns of an index of the table
+ACCESS_PATHS = {
+    'origins of project': (Origin, ('pjt_id',)),
+    'origins of category': (Origin, ('pjt_id', 'category_id')),
+    'origin of category by keyword': (Origin, ('category_id', 'origin_keyword')),
+    'synonyms of origin': (Synonym, ('origin_id',)),
+    'origins of synonym keyword': (Synonym, ('pjt_id', 'synm_keyword')),
+    'origins of normalized synonym keyword': (Synonym, ('pjt_id', 'synm_keyword_norm')),
+    'projects of user': (ProjectUser, ('user_id',)),
+}
+
+
+def verify_schema(engine: Engine) -> typing.Dict[str, typing.List[str]]:
+    """
+    Compare tables, columns, indexes and foreign keys declared in models
+    with database. Returns report of missing items. Foreign keys whose
+    ON DELETE differs from models are reported as missing too.
+    Every list is empty when schema is up to date
+        ex)
+            {'tables': [],
+             'columns': ['tbl_synonym_mocking.synm_keyword_norm'],
+             'indexes': ['tbl_origin_mocking.ix_origin_pjt_category'],
+             'foreign_keys': ['tbl_origin_mocking.category_id'],
+             'access_paths': ['origins of category']}
+
+    :param engine:
+        engine of database
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    report = {'tables': [], 'columns': [], 'indexes': [], 'foreign_keys': [], 'access_paths': []}
+    indexes = {}
+    for table in ModelBase.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            report['tables'].append(table.name)
+            continue
+
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in columns:
+                report['columns'].append('%s.%s' % (table.name, column.name))
+
+        indexes[table.name] = _existing_indexes(inspector, table)
+        for name, columns in _declared_indexes(table):
+            if not _has_index(indexes[table.name], name, columns):
+                report['indexes'].append('%s.%s' % (table.name, name))
+
+    for table, fk in mismatched_foreign_keys(engine):
+        report['foreign_keys'].append('%s.%s' % (table.name, ','.join(fk.column_keys)))
+
+    for path, (model, columns) in ACCESS_PATHS.items():
+        existing = indexes.get(model.__tablename__, {})
+        if not any(set(index[:len(columns)]) == set(columns)
+                   for index in existing.values()):
+            report['access_paths'].append(path)
+
+    return report
+
+
+def create_schema(engine: Engine) -> typing.Dict[str, typing.List[str]]:
+    """
+    Create missing tables, columns and indexes declared in models and
+    recreate foreign keys whose ON DELETE differs from models.
+    Values of added columns are written by reindex_schema.
+    Unique constraint missing in existing table is created as
+    unique index, because sqlite can not add constraint to table.
+    Returns report of created items in the form of verify_schema
+    """
+    report = verify_schema(engine)
+    ModelBase.metadata.create_all(engine)
+
+    missing_columns = set(report['columns'])
+    preparer = engine.dialect.identifier_preparer
+    for table in ModelBase.metadata.sorted_tables:
+        for column in table.columns:
+            if '%s.%s' % (table.name, column.name) not in missing_columns:
+                continue
+            sql = 'ALTER TABLE %s ADD COLUMN %s' % (
+                        preparer.format_table(table),
+                        CreateColumn(column).compile(dialect=engine.dialect))
+            with engine.begin() as conn:
+                conn.execute(text(sql))
+
+    _migrate_foreign_keys(engine, mismatched_foreign_keys(engine))
+
+    missing = set(report['indexes'])
+    for table in ModelBase.metadata.sorted_tables:
+        if table.name in report['tables']:
+            continue
+
+        for item in list(table.indexes) + list(table.constraints):
+            if '%s.%s' % (table.name, item.name) not in missing:
+                continue
+
+            if isinstance(item, Index):
+                item.create(bind=engine)
+                continue
+
+            # unique constraint is created as unique index
+            # without changing table of model
+            sql = 'CREATE UNIQUE INDEX %s ON %s (%s)' % (
+                        preparer.quote(item.name),
+                        preparer.format_table(table),
+                        ', '.join(preparer.quote(column.name) for column in item.columns))
+            with engine.begin() as conn:
+                conn.execute(text(sql))
+
+    return report
+
+
+def reindex_schema(engine: Engine) -> typing.Dict[str, int]:
+    """
+    Rebuild n-gram index of keyword fields and normalized columns
+    of keyword fields. n-gram index is not rebuilt on MySQL which
+    maintains FULLTEXT index by itself.
+    Returns the number of indexed items per model and normalized column
+        ex) {'Origin': 10, 'Synonym.synm_keyword_norm': 20}
+    """
+    counts = {}
+    session = Session(bind=engine)
+    try:
+        for model in (Project, Category, Origin, Synonym):
+            if search_fields(model) and not uses_fulltext(engine.dialect.name):
+                counts[model.__name__] = reindex_keywords(session, model)
+            if normalized_fields(model):
+                count = renormalize_fields(session, model)
+                for column in normalized_fields(model):
+                    counts['%s.%s' % (model.__name__, column)] = count
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    return counts
+
+
+def mismatched_foreign_keys(engine: Engine,
+                            tables: typing.Optional[typing.Iterable] = None) -> typing.List[typing.Tuple]:
+    """
+    Foreign keys of existing tables whose ON DELETE in database
+    differs from models. ex) table created before ON DELETE CASCADE
+    is declared. Returns list of model table and its foreign key
+
+    :param engine:
+        engine of database
+    :param tables:
+        tables to be checked. Default is every table of models
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    mismatched = []
+    for table in tables or ModelBase.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing = _existing_foreign_keys(engine, inspector, table)
+        for fk in table.foreign_key_constraints:
+            key = (tuple(fk.column_keys), fk.referred_table.name)
+            if key in existing and \
+                    (existing[key][1] or '').upper() != (fk.ondelete or '').upper():
+                mismatched.append((table, fk))
+    return mismatched
+
+
+def explain_access_paths(engine: Engine) -> typing.Dict[str, typing.List[typing.Tuple]]:
+    """
+    Returns query plan of each access path. Plan of every path
+    should show index(range) scan instead of full table scan
+    """
+    prefix = 'EXPLAIN QUERY PLAN ' if engine.dialect.name == 'sqlite' else 'EXPLAIN '
+
+    plans = {}
+    with engine.connect() as conn:
+        for path, (model, columns) in ACCESS_PATHS.items():
+            table = model.__table__
+            stmt = select([table]).where(and_(*[table.c[column] == _sample_value(table.c[column])
+                                                for column in columns]))
+            sql = str(stmt.compile(engine, compile_kwargs={'literal_binds': True}))
+            plans[path] = [tuple(row) for row in conn.execute(text(prefix + sql))]
+    return plans
+
+
+def _sample_value(column) -> typing.Any:
+    """
+    Value of column type compared in explained query. Column compared
+    with value of other type can not use its index. ex) varchar = 1 in MySQL
+    """
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return 1
+    return '' if issubclass(python_type, str) else 1
+
+
+def _declared_indexes(table) -> typing.List[typing.Tuple[str, typing.Tuple[str, ...]]]:
+    """
+    Names and columns of indexes and unique constraints declared in table
+    """
+    declared = []
+    for index in table.indexes:
+        declared.append((index.name, tuple(column.name for column in index.columns)))
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.name:
+            declared.append((constraint.name,
+                             tuple(column.name for column in constraint.columns)))
+    return declared
+
+
+def _existing_indexes(inspector, table) -> typing.Dict[str, typing.Tuple[str, ...]]:
+    """
+    Names and columns of indexes, unique constraints and
+    primary key existing in database
+    """
+    existing = {}
+    for index in inspector.get_indexes(table.name):
+        existing[index['name']] = tuple(index['column_names'])
+    for constraint in inspector.get_unique_constraints(table.name):
+        existing[constraint['name']] = tuple(constraint['column_names'])
+
+    pk = inspector.get_pk_constraint(table.name)
+    if pk and pk.get('constrained_columns'):
+        existing[pk.get('name') or 'PRIMARY'] = tuple(pk['constrained_columns'])
+    return existing
+
+
+def _existing_foreign_keys(engine, inspector, table) -> typing.Dict[typing.Tuple, typing.Tuple]:
+    """
+    Name and ON DELETE of foreign keys existing in database
+    keyed by constrained columns and referred table.
+    sqlite does not reflect ON DELETE, so it is read with pragma
+    """
+    existing = {}
+    if engine.dialect.name == 'sqlite':
+        columns = {}
+        with engine.connect() as conn:
+            rows = conn.execute(text('PRAGMA foreign_key_list(%s)'
+                                     % engine.dialect.identifier_preparer.quote(table.name)))
+            for row in rows:
+                # id, seq, table, from, to, on_update, on_delete, match
+                columns.setdefault(row[0], (row[2], row[6], []))[2].append(row[3])
+        for referred, ondelete, constrained in columns.values():
+            ondelete = None if ondelete == 'NO ACTION' else ondelete
+            existing[(tuple(constrained), referred)] = (None, ondelete)
+        return existing
+
+    for fk in inspector.get_foreign_keys(table.name):
+        key = (tuple(fk['constrained_columns']), fk['referred_table'])
+        existing[key] = (fk['name'], fk.get('options', {}).get('ondelete', None))
+    return existing
+
+
+def _migrate_foreign_keys(engine: Engine, mismatched: typing.List[typing.Tuple]):
+    """
+    Recreate foreign keys as declared in models. sqlite can not alter
+    constraint, so its table is rebuilt with rows copied.
+    The others drop and add foreign key with the same name
+    """
+    if not mismatched:
+        return
+
+    if engine.dialect.name == 'sqlite':
+        tables = []
+        for table, _ in mismatched:
+            if table not in tables:
+                tables.append(table)
+        for table in tables:
+            _rebuild_sqlite_table(engine, table)
+        return
+
+    preparer = engine.dialect.identifier_preparer
+    drop = 'DROP FOREIGN KEY' if engine.dialect.name == 'mysql' else 'DROP CONSTRAINT'
+    inspector = inspect(engine)
+    for table, fk in mismatched:
+        key = (tuple(fk.column_keys), fk.referred_table.name)
+        name = _existing_foreign_keys(engine, inspector, table)[key][0]
+        sql = 'ALTER TABLE %s ADD CONSTRAINT %s FOREIGN KEY (%s) REFERENCES %s (%s)' % (
+                    preparer.format_table(table),
+                    preparer.quote(name),
+                    ', '.join(preparer.quote(column) for column in fk.column_keys),
+                    preparer.format_table(fk.referred_table),
+                    ', '.join(preparer.quote(element.column.name) for element in fk.elements))
+        if fk.ondelete:
+            sql += ' ON DELETE %s' % fk.ondelete
+        with engine.begin() as conn:
+            conn.execute(text('ALTER TABLE %s %s %s' % (preparer.format_table(table),
+                                                        drop,
+                                                        preparer.quote(name))))
+            conn.execute(text(sql))
+
+
+def _rebuild_sqlite_table(engine: Engine, table):
+    """
+    Rebuild sqlite table in the form of model and copy its rows.
+    Foreign keys are not enforced while table is replaced
+    """
+    preparer = engine.dialect.identifier_preparer
+    # referred tables are copied together to resolve foreign keys
+    metadata = MetaData()
+    for model_table in table.metadata.sorted_tables:
+        model_table.tometadata(metadata)
+    new_table = table.tometadata(metadata, name='_new_' + table.name)
+    columns = [column['name'] for column in inspect(engine).get_columns(table.name)
+               if column['name'] in table.c]
+    column_names = ', '.join(preparer.quote(column) for column in columns)
+
+    with engine.connect() as conn:
+        conn.execute(text('PRAGMA foreign_keys=OFF'))
+        try:
+            with conn.begin():
+                conn.execute(CreateTable(new_table))
+                conn.execute(text('INSERT INTO %s (%s) SELECT %s FROM %s' % (
+                                    preparer.format_table(new_table),
+                                    column_names,
+                                    column_names,
+                                    preparer.format_table(table))))
+                conn.execute(text('DROP TABLE %s' % preparer.format_table(table)))
+                conn.execute(text('ALTER TABLE %s RENAME TO %s' % (
+                                    preparer.format_table(new_table),
+                                    preparer.quote(table.name))))
+                for index in table.indexes:
+                    index.create(bind=conn)
+                violations = conn.execute(text('PRAGMA foreign_key_check')).fetchall()
+                if violations:
+                    raise DBConnectionError('Foreign keys of %s are violated' % table.name,
+                                            str(violations))
+        finally:
+            conn.execute(text('PRAGMA foreign_keys=ON'))
+
+
+def _has_index(existing: typing.Dict[str, typing.Tuple[str, ...]],
+               name: str,
+               columns: typing.Tuple[str, ...]) -> bool:
+    """
+    Index exists when index of the same name or the same columns exists.
+    Unique constraint can be reflected as index of the same columns
+    """
+    return name in existing or columns in existing.values()
@@ -0,0 +1,354 @@
+import typing
+import unicodedata
+
+from sqlalchemy import (
+    bindparam,
+    select,
+    and_,
+    func,
+    inspect
+)
+
+from .model import ModelBase, KeywordNgram
+
+
+# The number of characters of a gram. It is the same with
+# ngram_token_size of MySQL ngram full-text parser
+NGRAM_SIZE = 2
+
+# The number of items indexed at once when index is rebuilt
+REINDEX_CHUNK_SIZE = 1000
+
+
+def ngrams(text: typing.Optional[str]) -> typing.Set[str]:
+    """
+    Grams of text in NGRAM_SIZE characters. Text is lowered
+    and text shorter than NGRAM_SIZE does not have gram
+        ex) 'Apple' -> {'ap', 'pp', 'pl', 'le'}
+    """
+    if not text:
+        return set()
+    text = str(text).lower()
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    Normalized form of keyword. Compatible characters are unified(NFKC),
+    whitespaces are collapsed and case is folded
+        ex) ' Ａpple  Pie ' -> 'apple pie'
+    """
+    keyword = unicodedata.normalize('NFKC', keyword)
+    return ' '.join(keyword.split()).casefold()
+
+
+def search_fields(model: 'MODEL') -> typing.Tuple[str, ...]:
+    """
+    Keyword fields of model which are searched with index
+    """
+    return getattr(model, '__search_fields__', ())
+
+
+def normalized_fields(model: 'MODEL') -> typing.Dict[str, str]:
+    """
+    Normalized columns of model and their keyword fields
+        ex) {'synm_keyword_norm': 'synm_keyword'}
+    """
+    return getattr(model, '__normalized_fields__', {})
+
+
+def normalize_fields(model: 'MODEL', fields: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+    """
+    Add normalized values of keyword fields in fields to be updated.
+    Values of insert are normalized by default of columns
+    """
+    normalized = normalized_fields(model)
+    if not any(field in fields for field in normalized.values()):
+        return fields
+
+    fields = dict(fields)
+    for column, field in normalized.items():
+        if field in fields:
+            value = fields[field]
+            fields[column] = normalize_keyword(value) if value is not None else None
+    return fields
+
+
+def uses_fulltext(dialect: str) -> bool:
+    """
+    MySQL searches with FULLTEXT index with ngram parser. The other
+    databases search with KeywordNgram table
+    """
+    return dialect == 'mysql'
+
+
+def search_clause(model: 'MODEL', field: str, name: str, dialect: str):
+    """
+    Make search expression of field with bound parameters.
+    Values are made by search_values with the same name
+
+    MySQL:
+        MATCH (field) AGAINST (:name IN BOOLEAN MODE)
+    The others:
+        id IN (SELECT doc_id FROM ngram WHERE field = .. AND gram IN (:name_grams)
+               GROUP BY doc_id HAVING count(gram) = :name_count)
+        AND field LIKE :name
+    Grams do not keep their position, so candidates are checked with LIKE
+
+    :param model:
+        target model
+    :param field:
+        keyword field in search_fields of model
+    :param name:
+        name of bound parameter
+    :param dialect:
+        name of database backend
+    """
+    column = getattr(model, field)
+    if uses_fulltext(dialect):
+        return column.match(bindparam(name))
+
+    ngram = KeywordNgram
+    candidates = select([ngram.doc_id]) \
+        .where(and_(ngram.field == _field_key(model, field),
+                    ngram.gram.in_(bindparam(name + '_grams', expanding=True)))) \
+        .group_by(ngram.doc_id) \
+        .having(func.count(ngram.gram) == bindparam(name + '_count'))
+    return and_(model.id.in_(candidates), column.like(bindparam(name)))
+
+
+def search_values(name: str, q: str, dialect: str) -> typing.Dict[str, typing.Any]:
+    """
+    Values of bound parameters of search_clause
+    """
+    if uses_fulltext(dialect):
+        # phrase of grams matches text containing q
+        return {name: '"%s"' % q.replace('"', ' ')}
+
+    grams = sorted(ngrams(q))
+    return {name: f'%{q}%',
+            name + '_grams': grams,
+            name + '_count': len(grams)}
+
+
+def index_keywords(session,
+                   model: 'MODEL',
+                   ids: typing.List[int],
+                   rows: typing.List[typing.Dict[str, typing.Any]]):
+    """
+    Write grams of keyword fields of items to KeywordNgram.
+    Previous grams of the items are replaced. It is skipped on MySQL
+    which maintains FULLTEXT index by itself.
+
+    :param session:
+        session writing items
+    :param model:
+        model of items
+    :param ids:
+        ids of items
+    :param rows:
+        values of items in the same order with ids.
+        Only keyword fields in rows are indexed
+    """
+    if not ids or uses_fulltext(session.get_bind().dialect.name):
+        return
+
+    table = KeywordNgram.__table__
+    for field in search_fields(model):
+        if field not in rows[0]:
+            continue
+
+        key = _field_key(model, field)
+        session.execute(table.delete()
+                        .where(and_(table.c.field == key,
+                                    table.c.doc_id.in_(ids))))
+        grams = [{'field': key, 'gram': gram, 'doc_id': id_}
+                 for id_, row in zip(ids, rows)
+                 for gram in ngrams(row[field])]
+        if grams:
+            session.execute(table.insert(), grams)
+
+
+def unindex_keywords(session, model: 'MODEL', ids: typing.List[int]):
+    """
+    Remove grams of deleted items from KeywordNgram
+    """
+    if not ids or not search_fields(model) or \
+            uses_fulltext(session.get_bind().dialect.name):
+        return
+
+    table = KeywordNgram.__table__
+    keys = [_field_key(model, field) for field in search_fields(model)]
+    session.execute(table.delete()
+                    .where(and_(table.c.field.in_(keys),
+                                table.c.doc_id.in_(ids))))
+
+
+def unindex_cascaded(session, model: 'MODEL', ids: typing.List[int]):
+    """
+    Remove grams of items deleted together with items of model
+    by ON DELETE CASCADE foreign keys. ex) origins of category
+    It must be called before items of model are deleted,
+    because cascaded items are selected through foreign keys
+    """
+    if not ids or uses_fulltext(session.get_bind().dialect.name):
+        return
+
+    table = KeywordNgram.__table__
+    for target, doc_ids in _cascaded_selects(model, ids):
+        keys = [_field_key(target, field) for field in search_fields(target)]
+        session.execute(table.delete()
+                        .where(and_(table.c.field.in_(keys),
+                                    table.c.doc_id.in_(doc_ids))))
+
+
+def has_indexed_items(model: 'MODEL') -> bool:
+    """
+    Whether keyword of model or keyword of items deleted
+    together with items of model by cascade is indexed
+    """
+    return bool(search_fields(model)) or bool(_cascaded_selects(model, []))
+
+
+def reindex_keywords(session, model: 'MODEL', chunk_size: int = REINDEX_CHUNK_SIZE) -> int:
+    """
+    Rebuild grams of every item of model. It is used to index items
+    written before index is maintained or outside of this package.
+    Grams of items which do not exist anymore are removed.
+    Returns the number of indexed items
+    """
+    fields = search_fields(model)
+    if not fields:
+        return 0
+
+    table = KeywordNgram.__table__
+    keys = [_field_key(model, field) for field in fields]
+    session.execute(table.delete()
+                    .where(and_(table.c.field.in_(keys),
+                                ~table.c.doc_id.in_(select([model.id])))))
+
+    columns = [getattr(model, field) for field in fields]
+    last_id = 0
+    count = 0
+    while True:
+        rows = session.query(model.id, *columns) \
+                      .filter(model.id > last_id) \
+                      .order_by(model.id) \
+                      .limit(chunk_size) \
+                      .all()
+        if not rows:
+            return count
+
+        ids = [row[0] for row in rows]
+        index_keywords(session, model, ids,
+                       [dict(zip(fields, row[1:])) for row in rows])
+        last_id = ids[-1]
+        count += len(rows)
+
+
+def renormalize_fields(session, model: 'MODEL', chunk_size: int = REINDEX_CHUNK_SIZE) -> int:
+    """
+    Write normalized columns of every item of model. It is used for
+    items written before normalized column is added.
+    Returns the number of written items
+    """
+    normalized = normalized_fields(model)
+    if not normalized:
+        return 0
+
+    table = model.__table__
+    fields = list(dict.fromkeys(normalized.values()))
+    stmt = table.update() \
+                .where(table.c.id == bindparam('_id')) \
+                .values({column: bindparam('_' + column) for column in normalized})
+    last_id = 0
+    count = 0
+    while True:
+        rows = session.query(model.id, *[getattr(model, field) for field in fields]) \
+                      .filter(model.id > last_id) \
+                      .order_by(model.id) \
+                      .limit(chunk_size) \
+                      .all()
+        if not rows:
+            return count
+
+        params = []
+        for row in rows:
+            values = normalize_fields(model, dict(zip(fields, row[1:])))
+            params.append(dict({'_' + column: values[column] for column in normalized},
+                               _id=row[0]))
+        session.execute(stmt, params)
+        last_id = rows[-1][0]
+        count += len(rows)
+
+
+def index_flushed(session, flush_context):
+    """
+    after_flush listener of session. Index keyword fields of items
+    inserted, updated and deleted with orm
+    """
+    if uses_fulltext(session.get_bind().dialect.name):
+        return
+
+    written = {}
+    for obj in session.new:
+        fields = search_fields(type(obj))
+        if fields:
+            written.setdefault(type(obj), []).append(obj)
+
+    for obj in session.dirty:
+        fields = search_fields(type(obj))
+        attrs = inspect(obj).attrs
+        if any(attrs[field].history.has_changes() for field in fields):
+            written.setdefault(type(obj), []).append(obj)
+
+    for model, objs in written.items():
+        fields = search_fields(model)
+        index_keywords(session,
+                       model,
+                       [obj.id for obj in objs],
+                       [{field: getattr(obj, field) for field in fields} for obj in objs])
+
+    deleted = {}
+    for obj in session.deleted:
+        if search_fields(type(obj)):
+            deleted.setdefault(type(obj), []).append(obj.id)
+
+    for model, ids in deleted.items():
+        unindex_keywords(session, model, ids)
+
+
+def _cascaded_selects(model: 'MODEL', ids: typing.List[int]) -> typing.List[typing.Tuple]:
+    """
+    Pairs of searchable model and select of ids of its items deleted
+    together with items of model by ON DELETE CASCADE foreign keys.
+    Foreign keys are followed recursively
+        ex) Category -> [(Origin, SELECT id FROM origin WHERE category_id IN (:ids))]
+    """
+    models = {cls.__table__: cls for cls in ModelBase.__subclasses__()}
+    selects = []
+    stack = [(model.__table__, ids, {model.__table__})]
+    while stack:
+        parent, parent_ids, path = stack.pop()
+        for child in parent.metadata.sorted_tables:
+            if child in path:
+                continue
+            for fk in child.foreign_key_constraints:
+                if fk.referred_table is not parent or \
+                        (fk.ondelete or '').upper() != 'CASCADE':
+                    continue
+
+                column = list(fk.columns)[0]
+                child_ids = select([child.c.id]).where(column.in_(parent_ids))
+                child_model = models.get(child, None)
+                if child_model is not None and search_fields(child_model):
+                    selects.append((child_model, child_ids))
+                stack.append((child, child_ids, path | {child}))
+    return selects
+
+
+def _field_key(model: 'MODEL', field: str) -> str:
+    """
+    Key of keyword field in KeywordNgram. ex) Origin.origin_keyword
+    """
+    return '%s.%s' % (model.__name__, field)
@@ -1 +1,40 @@
 #필요 타입 정의
+import typing
+
+
+class Page(list):
+    """
+    List of db models found in a page. It is returned from
+    find method of connection when pagination is applied and
+    carries pagination information to the handler.
+
+    :param items:
+        db models in the page
+    :param next_cursor:
+        Opaque token to request next page with keyset pagination.
+        It is None when there is no next page or keyset can not be applied.
+    :param total:
+        The number of all items matched. It is counted only when requested
+    :param page:
+        page number. It is None when page is requested with cursor
+    :param size:
+        How many items should appear per page
+    """
+    def __init__(self,
+                 items: typing.Iterable[typing.Any],
+                 next_cursor: typing.Optional[str] = None,
+                 total: typing.Optional[int] = None,
+                 page: typing.Optional[int] = None,
+                 size: typing.Optional[int] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+        self.total = total
+        self.page = page
+        self.size = size
+
+    @property
+    def pagination(self) -> typing.Dict[str, typing.Any]:
+        return {'page': self.page,
+                'size': self.size,
+                'next_cursor': self.next_cursor,
+                'total': self.total}
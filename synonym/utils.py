@@ -1,8 +1,24 @@
 import typing
+import itertools
 from functools import wraps
 from werkzeug.exceptions import BadRequest
+from sqlalchemy import bindparam, tuple_
 from synonym import MODELS, AND_OR, ORDER
 from .exceptions import ImproperlyDataStructureError
+from .search import (
+    NGRAM_SIZE,
+    search_fields,
+    search_clause,
+    search_values
+)
+
+
+# Maximum number of bound parameters of membership(in) list in a statement.
+# Longer list is split into chunks and each chunk is read with its own statement
+IN_CHUNK_SIZE = 1000
+
+# Membership operators of where
+MEMBERSHIP_OPS = ('in', 'not_in')
 
 
 def get_info_from_environ(environ, filter):
@@ -34,24 +50,41 @@ def _get_relation_cls(field):
 
 
 def make_one_by_one(fields):
-    result = []
-    keys = fields.keys()
     # 필드의 값이 여러개인 경우와 한 개인 경우가 섞여 있을 때
     # 모든 필드가 여러개 값을 같도록 함
     # 한 개인 경우는 같은 값으로 사이즈를 맞춰줌
     # {'a': 'hello', 'b': [1,2,3]}
     # [{'a': 'hello', 'b': 1},{'a': 'hello', 'b': 2}, {'a': 'hello', 'b': 3}]
+    # 순서는 유지되고 fields는 변경되지 않음
+    keys, rows = expand_columns(fields)
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def expand_columns(fields) -> typing.Tuple[typing.Tuple[str, ...], typing.List[typing.Tuple]]:
+    """
+    Expand fields which have list values to rows in columnar way.
+    List values are zipped in order and single values are broadcast
+    to every row. fields is not changed.
+    Returns keys and rows as tuple in the order of keys, so that rows
+    can be passed to executemany with keys.
+        ex)
+            {'a': 'hello', 'b': [1, 2, 3]}
+            -> (('a', 'b'), [('hello', 1), ('hello', 2), ('hello', 3)])
+
+    :param fields:
+        Dictionary of field and value or list of values
+    """
     size = _validate_fields(fields)
 
-    for _ in range(size):
-        flat_ = {}
-        for key in keys:
-            fv = fields[key]
-            if isinstance(fv, (list, tuple, set)):
-                fv = fv.pop()
-            flat_[key] = fv
-        result.append(flat_)
-    return result
+    keys = tuple(fields.keys())
+    columns = []
+    for key in keys:
+        fv = fields[key]
+        if isinstance(fv, (list, tuple, set)):
+            columns.append(fv)
+        else:
+            columns.append(itertools.repeat(fv, size))
+    return keys, list(zip(*columns))
 
 
 def _validate_fields(fields):
@@ -70,30 +103,24 @@ def _validate_fields(fields):
     return size
 
 
-def _resolve_param_by_one(model, fds, **params):
+def _resolve_param_by_one(plan, **params):
 
+    model = plan.model
     models = {}
     relations = {}
-    for fd in fds:
-        # Get field value from user input
-        value = params.get(fd, None)
-
-        # Raise error, if data model does not field attribute
-        if not hasattr(model, fd):
-            raise AttributeError('%s does not have %s attribute' % (model, fd))
-
-        field = getattr(model, fd)
-
+    for fd, relation_class in plan.fields:
         # If field is relation in model, make the relation parameter
-        if _is_relation(field):
-            relastion_class = _get_relation_cls(field)
+        if relation_class is not None:
+            attrs = _class_attributes(relation_class)
             for k, v in params.items():
-                if hasattr(relastion_class, k):
+                if k in attrs:
                     if fd not in relations :
-                        relations[fd] = {relastion_class: {k: v}}
+                        relations[fd] = {relation_class: {k: v}}
                     else:
-                        relations[fd][relastion_class][k] = v
+                        relations[fd][relation_class][k] = v
         else:
+            # Get field value from user input
+            value = params.get(fd, None)
             if value is None:
                 raise ValueError
             if model not in models:
@@ -104,87 +131,321 @@ def _resolve_param_by_one(model, fds, **params):
     return models, relations
 
 
-def _resolve_params(mn, fds, **params):
+def _resolve_params(plan, **params):
 
-    if mn not in MODELS:
-        raise KeyError('%s model is not exists' % mn)
-
-    model = MODELS[mn]
+    model = plan.model
     bulk = params.get('bulk', None)
 
     models = []
     relation   = []
 
     # If fields is not specified, select all data
-    if fds is None:
+    if plan.fields is None:
         return model, models, relation
 
     if bulk:
         for data in bulk:
             params.update(data)
-            ms, rs = _resolve_param_by_one(
-                                        model,
-                                        fds,
-                                        **params)
+            ms, rs = _resolve_param_by_one(plan, **params)
             models.append(ms)
             relation.append(rs)
 
     else:
-        models, rels = _resolve_param_by_one(
-                                        model,
-                                        fds,
-                                        **params)
+        models, rels = _resolve_param_by_one(plan, **params)
 
     return model, models, relation
 
 
-def _make_filter(model: 'MODEL',
-                  where: typing.List[typing.Union[str, typing.Tuple[str, str]]],
-                  **kwargs):
-    # If where is not specified, return None
-    if not where:
-        return None
-
-    and_or = None
-    filter = []
-    for exp in where:
-        # Expression is composed of field and operator(=,!=, like etc..) as tuple
-        # or logical operator(and, or) as str
-        if isinstance(exp, tuple):
-            field, op = exp
+class QueryPlan:
+    """
+    Compiled arguments of db_params. Model, field columns, relation
+    classes, filter and order by are resolved once per
+    (model, fields, where, order_by) shape and cached, so that only
+    values are bound for each call.
+
+    Filter is compiled to sql expression with bound parameters.
+    The value of each where field is bound to its parameter by bind_filters
+
+    Membership operators(in, not_in) take list of values and are compiled
+    to expanding parameter. Field can be tuple of fields for multi-key
+    membership and its values are lists of each field in the same order.
+        ex)
+            where = [(('category_id', 'origin_keyword'), 'in')]
+            kwargs = {'category_id': [1, 2], 'origin_keyword': ['a', 'b']}
+            -> (category_id, origin_keyword) IN ((1, 'a'), (2, 'b'))
+
+    search operator is keyword search with index of dialect. It is
+    compiled to MATCH AGAINST on MySQL and n-gram index lookup on the others.
+    Field which is not indexed is searched with like.
+        ex)
+            where = [('origin_keyword', 'search')]
+
+    :param mn:
+        model name in MODELS
+    :param fields:
+        tuple of model fields or None
+    :param where:
+        shape of where. on_off operator is resolved to = or !=
+        ex) (('pjt_id', '=='), 'and', ('origin_keyword', 'like'))
+    :param order_by:
+        tuple of field and order(desc, asc) or None
+    :param dialect:
+        name of database backend. ex) mysql, sqlite
+    """
+    def __init__(self, mn, fields, where, order_by, dialect=None):
+        if mn not in MODELS:
+            raise KeyError('%s model is not exists' % mn)
+
+        self.model = MODELS[mn]
+        self.dialect = dialect
+
+        # plan is identified by the shape of arguments
+        self.key = (mn, fields, where, order_by, dialect)
+        self.fields = self._compile_fields(fields)
+        self.filter, self.binds = self._compile_filter(where)
+
+        # in list can be split into separate statements
+        # only when every expression is combined with and
+        self.splittable = not where or 'or' not in where
+        self.order_by = _make_order_by(self.model, dict(order_by)) if order_by else None
+
+    def _compile_fields(self, fields):
+        if fields is None:
+            return None
+
+        model = self.model
+        compiled = []
+        for fd in fields:
+            # Raise error, if data model does not field attribute
+            if not hasattr(model, fd):
+                raise AttributeError('%s does not have %s attribute' % (model, fd))
+
+            field = getattr(model, fd)
+            relation_class = _get_relation_cls(field) if _is_relation(field) else None
+            compiled.append((fd, relation_class))
+        return tuple(compiled)
+
+    def _compile_filter(self, where):
+        # If where is not specified, filter is None
+        if not where:
+            return None, ()
+
+        model = self.model
+        and_or = None
+        filter = []
+        binds = []
+        for exp in where:
+            # Expression is composed of field and operator(=,!=, like etc..) as tuple
+            # or logical operator(and, or) as str
+            if isinstance(exp, tuple):
+                field, op = exp
+                fields = field if isinstance(field, tuple) else (field,)
+                name = 'w%d_%s' % (len(binds), '_'.join(fields))
+
+                if op in MEMBERSHIP_OPS:
+                    param = bindparam(name, expanding=True)
+                    mfs = [getattr(model, fd) for fd in fields]
+                    mf = tuple_(*mfs) if len(mfs) > 1 else mfs[0]
+                    clause = mf.in_(param)
+                    filter.append(clause if op == 'in' else ~clause)
+                    binds.append((name, field, op))
+                    continue
+
+                if op == 'search':
+                    if field in search_fields(model):
+                        filter.append(search_clause(model, field, name, self.dialect))
+                        binds.append((name, field, op))
+                        continue
+                    op = 'like'
+
+                param = bindparam(name)
+                mf = getattr(model, field)  # model field
+
+                if op == '==':
+                    filter.append(mf == param)
+                elif op == '!=':
+                    filter.append(mf != param)
+                else:
+                    filter.append(getattr(mf, op)(param))
+                binds.append((name, field, op))
+            else:
 
+                # Make filter when logical operator changes
+                if and_or and and_or != AND_OR[exp]:
+                    filter = [and_or(*filter)]
+                and_or = AND_OR[exp]
+        if and_or:
+            filter = and_or(*filter)
+        return filter, tuple(binds)
+
+    def bind_filters(self, **kwargs) -> typing.Optional[typing.List[typing.Any]]:
+        """
+        Bind values of where fields to compiled filter. Returns list of
+        filters. It has a single filter unless membership list is longer
+        than IN_CHUNK_SIZE. In that case, the longest in list is split into
+        chunks and a filter is made for each chunk. Items found with the
+        filters are the same with items found with whole list.
+        Chunks are made only when where is combined with and, because
+        union of chunks is not the same with whole list under or.
+        not_in list is not split for the same reason.
+
+        :param kwargs:
+            arguments of client method including values of where fields
+        """
+        if self.filter is None:
+            return None
+
+        values = {}
+        chunked = None
+        for name, field, op in self.binds:
             # field must be specified with corresponding value
             # if not , raise value error
-            if field not in kwargs:
+            fields = field if isinstance(field, tuple) else (field,)
+            if any(fd not in kwargs for fd in fields):
                 raise ValueError
 
-            fv = kwargs[field]  # field value
-            mf = getattr(model, field)  # model field
-
-            # on_off is =, != operator
-            # If value is True, it represent =
-            # If value is False, it represent !=
-            if op == 'on_off':
-                on_off = kwargs[op]
-                is_on = on_off[field]
-                if is_on:
-                    filter.append(mf == fv)
-                else:
-                    filter.append(mf != fv)
+            if op in MEMBERSHIP_OPS:
+                fv = _membership_values(field, **kwargs)
+                if op == 'in' and self.splittable and \
+                        len(fv) * len(fields) > IN_CHUNK_SIZE and \
+                        (chunked is None or len(fv) > len(values[chunked[0]])):
+                    chunked = (name, max(IN_CHUNK_SIZE // len(fields), 1))
+            elif op == 'search':
+                values.update(search_values(name, kwargs[field], self.dialect))
+                continue
             else:
+                fv = kwargs[field]  # field value
                 if op == 'like':
                     fv = f'%{fv}%'
-                op = getattr(mf, op)
-                filter.append(op(fv))
+            values[name] = fv
+
+        if chunked is None:
+            return [self._bind(values)]
+
+        name, size = chunked
+        whole = values[name]
+        filters = []
+        for start in range(0, len(whole), size):
+            values[name] = whole[start:start + size]
+            filters.append(self._bind(values))
+        return filters
+
+    def values_key(self, **kwargs) -> typing.Tuple[str, ...]:
+        """
+        Values of where fields in the form of string. Together with key
+        of plan, it identifies filters made by bind_filters, so filters
+        do not need to be compiled to be compared. ex) cache key
+        """
+        key = []
+        for _, field, _ in self.binds:
+            fields = field if isinstance(field, tuple) else (field,)
+            key.extend(repr(kwargs.get(fd, None)) for fd in fields)
+        return tuple(key)
+
+    def _bind(self, values):
+        if isinstance(self.filter, list):
+            return [clause.params(values) for clause in self.filter]
+        return self.filter.params(values)
+
+
+def _membership_values(field, **kwargs) -> typing.List[typing.Any]:
+    """
+    Values of membership operator. Values of multi-key membership are
+    zipped from lists of each field.
+        ex)
+            field = ('category_id', 'origin_keyword')
+            kwargs = {'category_id': [1, 2], 'origin_keyword': ['a', 'b']}
+            -> [(1, 'a'), (2, 'b')]
+    """
+    if not isinstance(field, tuple):
+        fv = kwargs[field]
+        if isinstance(fv, (list, tuple, set)):
+            return list(fv)
+        return [fv]
+
+    columns = [kwargs[fd] for fd in field]
+    size = len(columns[0])
+    if any(len(column) != size for column in columns):
+        raise ImproperlyDataStructureError("All listed data size must be the same")
+    return list(zip(*columns))
+
+
+_plans: typing.Dict[typing.Tuple, QueryPlan] = {}
+
+
+def compile_plan(mn, fields, where, order_by, dialect=None, **kwargs) -> QueryPlan:
+    """
+    Returns cached query plan of arguments. It is compiled when
+    the shape of arguments is requested for the first time
+
+    :param mn:
+        model name in MODELS
+    :param fields:
+        list of model fields
+    :param where:
+        list of expressions composed of (field, operator) tuple
+        and logical operator(and, or)
+        ex) [('pjt_id', 'on_off'), 'and', ('origin_keyword', 'like')]
+    :param order_by:
+        dictionary of field and order(desc, asc)
+        ex) {'created_at': 'desc'}
+    :param dialect:
+        name of database backend. ex) mysql, sqlite
+    :param kwargs:
+        arguments of client method. on_off is read from it
+    """
+    key = (mn,
+           tuple(fields) if fields is not None else None,
+           _where_shape(where, **kwargs),
+           tuple(order_by.items()) if order_by else None,
+           dialect)
+
+    plan = _plans.get(key, None)
+    if plan is None:
+        plan = QueryPlan(*key)
+        _plans[key] = plan
+    return plan
+
+
+def _where_shape(where, **kwargs):
+    """
+    Hashable shape of where without values.
+    on_off is =, != operator
+    If value is True, it represent =
+    If value is False, it represent !=
+    search shorter than a gram can not use index, so it is like
+    """
+    if not where:
+        return None
+
+    shape = []
+    for exp in where:
+        if isinstance(exp, tuple):
+            field, op = exp
+            if op == 'on_off':
+                on_off = kwargs[op]
+                op = '==' if on_off[field] else '!='
+            elif op == 'search' and len(str(kwargs.get(field, None) or '')) < NGRAM_SIZE:
+                op = 'like'
+            shape.append((field, op))
         else:
+            shape.append(exp)
+    return tuple(shape)
+
+
+_class_attrs: typing.Dict[typing.Any, typing.FrozenSet[str]] = {}
 
-            # Make filter when logical operator changes
-            if and_or and and_or != AND_OR[exp]:
-                filter = [and_or(*filter)]
-            and_or = AND_OR[exp]
-    if and_or:
-        filter = and_or(*filter)
-    return filter
+
+def _class_attributes(cls) -> typing.FrozenSet[str]:
+    """
+    Cached attribute names of relation class.
+    It replaces hasattr on each parameter
+    """
+    attrs = _class_attrs.get(cls, None)
+    if attrs is None:
+        attrs = frozenset(dir(cls))
+        _class_attrs[cls] = attrs
+    return attrs
 
 
 def _make_order_by(model, order_by, **kwargs):
@@ -201,16 +462,30 @@ def _make_order_by(model, order_by, **kwargs):
     return ords
 
 
-def _prepare_interface(model, fields, **kwargs):
+def _prepare_interface(mn, fields, dialect=None, **kwargs):
 
     where = kwargs.pop('where', None)
-    model, mapping, rels = _resolve_params(model, fields, **kwargs)  # Todo models 다시 이름 짓자....
+    order_by = kwargs.pop('order_by', None)
+
+    # order_by can be sql expressions already.
+    # They are not a part of plan
+    is_planned = order_by is None or isinstance(order_by, dict)
+    if not isinstance(order_by, dict):
+        order_by = None
+
+    plan = compile_plan(mn, fields, where, order_by, dialect, **kwargs)
+    model, mapping, rels = _resolve_params(plan, **kwargs)  # Todo models 다시 이름 짓자....
     if not rels:
         rels = None
 
-    filter = _make_filter(model, where, **kwargs)
+    filters = plan.bind_filters(**kwargs)
+
+    # filter and order by are identified by plan and values
+    query_key = None
+    if is_planned:
+        query_key = (plan.key, plan.values_key(**kwargs))
 
-    return model, mapping, rels, filter
+    return model, mapping, rels, filters, plan.order_by, query_key
 
 
 def db_params(**params):
@@ -223,7 +498,9 @@ def db_params(**params):
             fds = kwargs.pop('fields', None)
 
             try:
-                interface = _prepare_interface(mn, fds, **kwargs)
+                # search is compiled for database backend of client
+                dialect = getattr(args[0], 'dialect', None) if args else None
+                interface = _prepare_interface(mn, fds, dialect, **kwargs)
 
             except (KeyError,
                     AttributeError,
@@ -231,9 +508,19 @@ def db_params(**params):
                 """exception 처리 잘하"""
                 raise e
 
-            interface, filter = interface[:3], interface[-1]
-            if filter is not None:
-                kwargs['filter'] = filter
+            filters, order_by, query_key = interface[3:]
+            interface = interface[:3]
+            if filters is not None:
+                kwargs['filter'] = filters[0]
+
+                # membership list is split into chunks
+                # items are found with each filter
+                if len(filters) > 1:
+                    kwargs['filter_chunks'] = filters
+            if order_by is not None:
+                kwargs['order_by'] = order_by
+            if query_key is not None:
+                kwargs['query_key'] = query_key
 
             args += interface
             return f(*args, **kwargs)
@@ -0,0 +1,88 @@
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('elasticsearch')
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from synonym.model import ModelBase, Project, ProjectUser, Category, Origin, Synonym
+from synonym.connections import DBConnection
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    ModelBase.metadata.create_all(engine)
+    session = Session(bind=engine)
+
+    project = Project(pjt_name='project')
+    category = Category(category_name='category')
+    project.category.append(category)
+    session.add(project)
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def conn(session):
+    conn = DBConnection(None)
+    conn._session = lambda: session
+    return conn
+
+
+def test_ids_follow_rows(session, conn):
+    category = session.query(Category).one()
+    session.add(Origin(pjt_id=category.pjt_id, category_id=category.id,
+                       origin_keyword='existing'))
+    session.flush()
+
+    # value of other form than column is stored as type of column
+    rows = [{'pjt_id': category.pjt_id, 'category_id': ' %d' % category.id,
+             'origin_keyword': 'keyword%d' % i} for i in range(3)]
+    ids = conn._insert_chunk(Origin, rows)
+
+    for id, row in zip(ids, rows):
+        assert session.query(Origin).get(id).origin_keyword == row['origin_keyword']
+
+
+def test_upsert_ids(session, conn):
+    category = session.query(Category).one()
+    rows = [{'pjt_id': category.pjt_id, 'category_id': category.id,
+             'origin_keyword': 'keyword%d' % i} for i in range(2)]
+    ids = conn._insert_chunk(Origin, rows)
+    assert conn._insert_chunk(Origin, list(reversed(rows)), upsert=True) \
+        == list(reversed(ids))
+
+
+def test_ids_without_unique_key(session, conn):
+    project = session.query(Project).one()
+    rows = [{'pjt_id': project.id, 'user_id': None} for _ in range(2)]
+    ids = conn._insert_chunk(ProjectUser, rows)
+
+    assert len(set(ids)) == 2
+    assert sorted(ids) == sorted(item.id for item in session.query(ProjectUser))
+
+
+def test_diff_deletes_relations_without_cascade(session, conn):
+    category = session.query(Category).one()
+    origin = Origin(pjt_id=category.pjt_id, category_id=category.id,
+                    origin_keyword='removed')
+    session.add(origin)
+    session.flush()
+    session.add(Synonym(pjt_id=category.pjt_id, category_id=category.id,
+                        origin_id=origin.id, synm_keyword='synonym'))
+    session.flush()
+
+    # foreign key of synonym created before ON DELETE CASCADE
+    conn._uncascaded = {Origin.__tablename__}
+    row = {'pjt_id': category.pjt_id, 'category_id': category.id,
+           'origin_keyword': 'added'}
+    relation = {'synm_keyword': 'other', 'pjt_id': category.pjt_id,
+                'category_id': category.id}
+    summary = conn.bulk_diff(Origin, [{Origin: row}], [{'synonym': {Synonym: relation}}],
+                             Origin.category_id == category.id, None)
+
+    assert summary['removed_models'] == 1
+    assert [item.synm_keyword for item in session.query(Synonym)] == ['other']
@@ -0,0 +1,75 @@
+import time
+import typing
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('elasticsearch')
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from synonym.model import ModelBase, Project, Category, Origin
+from synonym.handler import DBHandler
+from synonym.response import CategoryResponse
+
+
+@pytest.fixture
+def handler():
+    engine = create_engine('sqlite://',
+                           connect_args={'check_same_thread': False},
+                           poolclass=StaticPool)
+    ModelBase.metadata.create_all(engine)
+
+    handler = DBHandler('sqlite://', cache_size=16, cache_ttl=60)
+    handler.connection.create_session(bind=engine)
+
+    session = handler.connection.session
+    project = Project(pjt_name='project')
+    project.category.append(Category(category_name='category'))
+    session.add(project)
+    session.commit()
+    handler.close()
+    yield handler
+    handler.connection.pin_reads(0)
+    handler.close()
+
+
+def find_categories(handler):
+    return handler.perform('find',
+                           model=Category,
+                           mapping={},
+                           relations=None,
+                           response_model=typing.List[CategoryResponse],
+                           filter=None,
+                           order_by=None)
+
+
+def add_category(handler, name):
+    project = handler.connection.session.query(Project).one()
+    return handler.perform('insert',
+                           model=Category,
+                           mapping={Category: {'pjt_id': project.id,
+                                               'category_name': name}},
+                           relations=None,
+                           response_model=CategoryResponse,
+                           filter=None,
+                           order_by=None)
+
+
+def test_write_invalidates_cache(handler):
+    assert len(find_categories(handler)['data']) == 1
+    assert handler.cache.stats()['size'] == 1
+
+    add_category(handler, 'other')
+    assert handler.cache.stats()['size'] == 0
+    assert len(find_categories(handler)['data']) == 2
+
+
+def test_pinned_read_is_not_cached(handler):
+    find_categories(handler)
+
+    handler.connection.pin_reads(time.time() + 60)
+    hits = handler.cache.hits
+    assert len(find_categories(handler)['data']) == 1
+    assert handler.cache.hits == hits
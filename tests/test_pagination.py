@@ -0,0 +1,98 @@
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('elasticsearch')
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from synonym.model import ModelBase, Project, Category, Origin
+from synonym.connections import DBConnection
+from synonym.search import reindex_keywords
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    ModelBase.metadata.create_all(engine)
+    session = Session(bind=engine)
+
+    project = Project(pjt_name='project')
+    category = Category(category_name='category')
+    project.category.append(category)
+    session.add(project)
+    session.flush()
+    for i in range(5):
+        session.add(Origin(pjt_id=project.id,
+                           category_id=category.id,
+                           origin_keyword='keyword%d' % i))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_page_then_next_cursor(session):
+    conn = DBConnection(None)
+    query = session.query(Origin)
+
+    page = conn._paginate(query, Origin, 1, 2, None, False, with_total=True)
+    assert [item.origin_keyword for item in page] == ['keyword0', 'keyword1']
+    assert page.total == 5
+    assert page.next_cursor
+
+    keywords = [item.origin_keyword for item in page]
+    cursor = page.next_cursor
+    while cursor:
+        page = conn._paginate(query, Origin, None, 2, cursor, False)
+        keywords.extend(item.origin_keyword for item in page)
+        cursor = page.next_cursor
+    assert keywords == ['keyword%d' % i for i in range(5)]
+
+    page = conn._paginate(query, Origin, 2, 2, None, False)
+    assert [item.origin_keyword for item in page] == ['keyword2', 'keyword3']
+
+
+@pytest.fixture
+def client(session, monkeypatch):
+    monkeypatch.setenv('DB_IP', 'localhost')
+    flask = pytest.importorskip('flask')
+
+    from synonym.apps import db_client, init_db_session
+    from synonym.apps.origin import create_origin_app
+    from synonym.apps.category import create_category_app
+    from synonym.apps.encoder import init_json_provider
+
+    connection = db_client.handler.connection
+    connection._dialect = 'sqlite'
+    connection.create_session(bind=session.get_bind())
+
+    app = init_json_provider(flask.Flask(__name__))
+    app = init_db_session(app)
+    app.register_blueprint(create_origin_app())
+    app.register_blueprint(create_category_app())
+    yield app.test_client()
+    connection._session = None
+
+
+def test_list_without_page(client, monkeypatch):
+    import synonym.apps as apps
+    monkeypatch.setattr(apps, 'DEFAULT_PAGE_SIZE', 2)
+    monkeypatch.setattr(apps, 'MAX_PAGE_SIZE', 3)
+
+    body = client.get('/api/origins').get_json()
+    assert [item['origin_keyword'] for item in body['data']] == ['keyword0', 'keyword1']
+
+    body = client.get('/api/origins?size=10').get_json()
+    assert len(body['data']) == 3
+
+
+def test_list_with_search_term(client, session):
+    project = session.query(Project).one()
+    session.add(Category(pjt_id=project.id, category_name='other'))
+    session.flush()
+    reindex_keywords(session, Category)
+    session.commit()
+
+    body = client.get('/api/pjts/%d/categories?q=categ' % project.id).get_json()
+    assert body['status'] == 'success'
+    assert [item['category_name'] for item in body['data']] == ['category']